@@ -0,0 +1,253 @@
+"""Benchmarks for the solve, layout, render and encode hot paths.
+
+Runs headless (SDL dummy driver). Every case is timed at the sizes of the
+chosen tier, from the bundled problems ('tiny') up to million-node inputs
+('large'), and the results are written as JSON so two runs can be compared:
+
+    python benchmarks.py run --tier small -o before.json
+    python benchmarks.py run --tier small -o after.json
+    python benchmarks.py compare before.json after.json
+
+Run it from the repository directory, where the apps find their images.
+compare prints the median time of every (case, size) in both runs and exits
+with status 1 when one got slower by more than --threshold.
+
+Cases whose cost grows quadratically (one frame per node, or recursion per
+node in tree_game_better) stop at smaller sizes than the rest; their size
+is the node or tree count, for the grid cases it is the board side.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+pygame.init()
+
+TIERS = ('tiny', 'small', 'medium', 'large')
+# A case runs at least once and then until REPEAT runs or BUDGET seconds
+REPEAT = 5
+BUDGET = 2.0
+
+
+def _board(n, seed=0):
+    import boardgen
+    return boardgen.scatter(n, n, 0.3, seed)
+
+
+def _graph_with_board(n):
+    """graph.py with its catalog swapped for one n x n board, and a fresh session state."""
+    import graph
+    from catalog import Catalog
+    from flask import g
+    if n is None:
+        graph.catalog = Catalog.from_problems(graph.BUILTIN_PROBLEMS)
+        number = len(graph.BUILTIN_PROBLEMS) - 1
+    else:
+        graph.catalog = Catalog.from_problems([_board(n)])
+        number = 0
+    context = graph.app.test_request_context()
+    context.push()
+    g.state = graph.GameState()
+    return graph, number, context
+
+
+def graph_dijkstra(n):
+    graph, number, context = _graph_with_board(n)
+    graph.setup_grid(number)
+    grid, start = graph.state.grid, (graph.state.grid.start.row, graph.state.grid.start.col)
+    context.pop()
+    return lambda: graph.dijkstra(grid, start)
+
+
+def graph_setup_grid(n):
+    graph, number, context = _graph_with_board(n)
+    return lambda: graph.setup_grid(number), context.pop
+
+
+def graph_generate_frame(n):
+    graph, number, context = _graph_with_board(n)
+    graph.setup_grid(number)
+    return lambda: graph.generate_frame((0, 1)), context.pop
+
+
+_game1_bundled = []
+
+
+def game1_solution_frames(n):
+    import game1
+    if not _game1_bundled:
+        _game1_bundled.extend((game1.TREE_VALUES, game1.SOLUTION_INDICES))
+    if n is None:
+        game1.TREE_VALUES, game1.SOLUTION_INDICES = _game1_bundled
+    else:
+        # Alternating values; the marked run covers the middle half
+        game1.TREE_VALUES = [(-1) ** i * (i % 7 + 1) for i in range(n)]
+        game1.SOLUTION_INDICES = list(range(n // 4, 3 * n // 4))
+    return game1.tree_visualizer.generate_solution_frames
+
+
+def _sorted_values(n):
+    return list(range(7 if n is None else n))
+
+
+def game3_sorted_array_to_bst(n):
+    import game3
+    values = _sorted_values(n)
+    return lambda: game3.animator._sorted_array_to_bst(values)
+
+
+def game3_assign_positions(n):
+    import game3
+    root = game3.animator._sorted_array_to_bst(_sorted_values(n))
+    return lambda: game3.animator._assign_positions(root)
+
+
+def game3_generate_animation(n):
+    import game3
+    values = _sorted_values(n)
+    return lambda: game3.animator.generate_animation(values)
+
+
+def tree_build_unbalanced(n):
+    import tree_game_better
+    values = _sorted_values(n)
+    return lambda: tree_game_better.build_unbalanced_tree(values)
+
+
+def tree_animate_balancing(n):
+    import tree_game_better
+    values = _sorted_values(n)
+    return lambda: tree_game_better.animate_balancing(None, values, delay=0)
+
+
+# name -> (prepare, sizes per tier). prepare(size) returns the function to
+# time, or (function, cleanup). A size of None means the bundled inputs.
+CASES = {
+    'graph.dijkstra': (graph_dijkstra, {'tiny': [None], 'small': [100], 'medium': [316], 'large': [1000]}),
+    'graph.setup_grid': (graph_setup_grid, {'tiny': [None], 'small': [100], 'medium': [316], 'large': [1000]}),
+    'graph.generate_frame': (graph_generate_frame, {'tiny': [None], 'small': [100], 'medium': [316], 'large': [1000]}),
+    'game1.generate_solution_frames': (game1_solution_frames, {'tiny': [None], 'small': [50], 'medium': [200], 'large': [500]}),
+    'game3._sorted_array_to_bst': (game3_sorted_array_to_bst, {'tiny': [None], 'small': [1000], 'medium': [100000], 'large': [1000000]}),
+    'game3._assign_positions': (game3_assign_positions, {'tiny': [None], 'small': [1000], 'medium': [100000], 'large': [1000000]}),
+    'game3.generate_animation': (game3_generate_animation, {'tiny': [None], 'small': [100], 'medium': [1000], 'large': [10000]}),
+    # Recursion depth grows with n, so these stay below the recursion limit
+    'tree_game_better.build_unbalanced_tree': (tree_build_unbalanced, {'tiny': [None], 'small': [100], 'medium': [500], 'large': [900]}),
+    'tree_game_better.animate_balancing': (tree_animate_balancing, {'tiny': [None], 'small': [50], 'medium': [150], 'large': [300]}),
+}
+
+
+def time_case(func, repeat=REPEAT, budget=BUDGET):
+    times = []
+    began = time.perf_counter()
+    while not times or (len(times) < repeat and time.perf_counter() - began < budget):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(tiers, cases=None, repeat=REPEAT, budget=BUDGET, log=print):
+    results = []
+    for name, (prepare, sizes) in CASES.items():
+        if cases and not any(pattern in name for pattern in cases):
+            continue
+        for tier in tiers:
+            for size in sizes[tier]:
+                prepared = prepare(size)
+                func, cleanup = prepared if isinstance(prepared, tuple) else (prepared, None)
+                try:
+                    times = time_case(func, repeat, budget)
+                finally:
+                    if cleanup:
+                        cleanup()
+                result = {
+                    'case': name,
+                    'tier': tier,
+                    'size': size,
+                    'runs': len(times),
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'mean': statistics.fmean(times),
+                }
+                results.append(result)
+                log(f"{name:42} {tier:7} {str(size or 'bundled'):>8} {result['median'] * 1000:12.3f} ms")
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pygame': pygame.version.ver,
+        },
+        'results': results,
+    }
+
+
+def compare(before, after, threshold=0.1):
+    """Rows of (case, size, before, after, ratio, regressed) for results in both runs."""
+    old = {(r['case'], r['size']): r for r in before['results']}
+    rows = []
+    for result in after['results']:
+        previous = old.get((result['case'], result['size']))
+        if previous is None:
+            continue
+        ratio = result['median'] / previous['median'] if previous['median'] else float('inf')
+        rows.append((result['case'], result['size'], previous['median'], result['median'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='time the cases and write JSON results')
+    run_parser.add_argument('--tier', choices=TIERS, action='append', help='repeatable; default tiny and small')
+    run_parser.add_argument('--case', action='append', help='only cases whose name contains this; repeatable')
+    run_parser.add_argument('--repeat', type=int, default=REPEAT)
+    run_parser.add_argument('--budget', type=float, default=BUDGET, help='seconds per case and size')
+    run_parser.add_argument('-o', '--output', default='benchmark-results.json')
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown, 0.1 = 10%%')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run(args.tier or ['tiny', 'small'], args.case, args.repeat, args.budget)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Wrote {len(report["results"])} results to {args.output}')
+        return 0
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    rows = compare(before, after, args.threshold)
+    regressions = 0
+    for case, size, old, new, ratio, regressed in rows:
+        regressions += regressed
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{case:42} {str(size or 'bundled'):>8} {old * 1000:10.3f} -> {new * 1000:10.3f} ms  x{ratio:5.2f} {flag}")
+    print(f'{len(rows)} compared, {regressions} regressions over {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
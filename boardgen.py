@@ -0,0 +1,136 @@
+"""Seeded board generator for load and scaling tests.
+
+Two kinds of boards, both always solvable from start to exit:
+
+    maze     a sidewinder spanning-tree maze over the even cells, optionally
+             thinned towards ``density`` by knocking out random walls
+             (opening cells never disconnects the tree)
+    scatter  obstacles dropped independently with probability ``density``,
+             with a random monotone corridor carved from start to exit
+
+Boards are built with NumPy over blocks of rows, so memory stays bounded and
+a 10,000x10,000 board takes seconds. The same (kind, size, density, seed,
+number) always gives the same board. Boards are returned in the dict shape
+write_catalog expects.
+
+    python boardgen.py boards.cat --count 100 --size 2000 --kind maze --seed 1
+"""
+import argparse
+
+import numpy as np
+
+from catalog import write_catalog
+
+# Rows generated per block; bounds the temporary arrays to a few MB per
+# thousand columns
+BLOCK_ROWS = 512
+
+
+def _rng(seed, number):
+    # Board `number` of a run is reproducible on its own
+    return np.random.default_rng([seed, number])
+
+
+def maze(rows, cols, seed=0, number=0, density=None):
+    """Sidewinder maze: rooms on even cells, walls in between.
+
+    The top room row is one open corridor; every other room row is split
+    into random runs, and each run opens north from one random room. Every
+    room is therefore connected to the top row exactly once, which makes the
+    rooms a spanning tree. With ``density`` below the maze's own wall share,
+    walls are removed at random until about that share of cells is blocked.
+    """
+    rng = _rng(seed, number)
+    room_rows, room_cols = (rows + 1) // 2, (cols + 1) // 2
+    bitmap = np.ones((rows, cols), dtype=np.bool_)
+    bitmap[0, 0:2 * room_cols - 1] = False
+
+    for top in range(1, room_rows, BLOCK_ROWS):
+        count = min(BLOCK_ROWS, room_rows - top)
+        # close[i, j]: room j ends its run (no passage east); the last room always does
+        close = rng.integers(0, 2, size=(count, room_cols), dtype=np.uint8).astype(np.bool_)
+        close[:, -1] = True
+        block = bitmap[2 * top:2 * (top + count) - 1]
+        block[0::2, 0::2] = False
+        block[0::2, 1:2 * room_cols - 1:2] = close[:, :-1]
+
+        # One random room per run carves the wall above it
+        flat_close = close.reshape(-1)
+        ends = np.flatnonzero(flat_close)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        chosen = starts + (rng.random(starts.size) * (ends - starts + 1)).astype(np.int64)
+        room_row, room_col = np.divmod(chosen, room_cols)
+        bitmap[2 * (top + room_row) - 1, 2 * room_col] = False
+
+    if density is not None:
+        _thin(bitmap, density, rng)
+    exit = (2 * (room_rows - 1), 2 * (room_cols - 1))
+    return {'rows': rows, 'cols': cols, 'start': (0, 0), 'exit': exit, 'bitmap': bitmap}
+
+
+def _thin(bitmap, density, rng):
+    walls = np.count_nonzero(bitmap)
+    target = density * bitmap.size
+    if walls <= target:
+        return
+    keep = target / walls
+    for top in range(0, bitmap.shape[0], BLOCK_ROWS):
+        block = bitmap[top:top + BLOCK_ROWS]
+        block &= rng.random(block.shape, dtype=np.float32) < keep
+
+
+def scatter(rows, cols, density, seed=0, number=0):
+    """Uniform random obstacles plus a carved staircase from corner to corner."""
+    rng = _rng(seed, number)
+    bitmap = np.empty((rows, cols), dtype=np.bool_)
+    for top in range(0, rows, BLOCK_ROWS):
+        block = bitmap[top:top + BLOCK_ROWS]
+        block[:] = rng.random(block.shape, dtype=np.float32) < density
+
+    # A random interleaving of the down and right moves of a monotone path
+    moves = np.zeros(rows + cols - 2, dtype=np.bool_)
+    moves[:cols - 1] = True
+    rng.shuffle(moves)
+    path_cols = np.concatenate(([0], np.cumsum(moves)))
+    path_rows = np.concatenate(([0], np.cumsum(~moves)))
+    bitmap[path_rows, path_cols] = False
+    return {'rows': rows, 'cols': cols, 'start': (0, 0), 'exit': (rows - 1, cols - 1), 'bitmap': bitmap}
+
+
+KINDS = {'maze', 'scatter'}
+
+
+def generate(kind, rows, cols, density=None, seed=0, number=0):
+    if kind == 'maze':
+        return maze(rows, cols, seed, number, density)
+    if kind == 'scatter':
+        return scatter(rows, cols, 0.3 if density is None else density, seed, number)
+    raise ValueError(f'Unknown board kind: {kind}')
+
+
+def boards(kind, count, rows, cols, density=None, seed=0):
+    """Yield ``count`` boards one at a time, for streaming into a catalog."""
+    for number in range(count):
+        yield generate(kind, rows, cols, density, seed, number)
+
+
+def export(path, kind, count, rows, cols, density=None, seed=0):
+    return write_catalog(path, boards(kind, count, rows, cols, density, seed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write generated boards to a problem catalog')
+    parser.add_argument('path')
+    parser.add_argument('--kind', choices=sorted(KINDS), default='maze')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--size', type=int, default=100, help='rows and columns')
+    parser.add_argument('--rows', type=int)
+    parser.add_argument('--cols', type=int)
+    parser.add_argument('--density', type=float)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    written = export(
+        args.path, args.kind, args.count, args.rows or args.size, args.cols or args.size,
+        args.density, args.seed
+    )
+    print(f'Wrote {written} boards to {args.path}')
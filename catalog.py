@@ -0,0 +1,157 @@
+"""Binary problem catalog.
+
+Layout (all integers little-endian):
+
+    header   magic b'GRDC', version u16, reserved u16, count u32, index offset u64
+    records  rows u32, cols u32, start row/col u32, exit row/col u32,
+             then the obstacle bitmap packed 8 cells per byte (row-major)
+    index    count x (record offset u64, record length u64)
+
+The file is memory-mapped and only the header and index are read up front;
+a record is decoded when it is asked for, so opening a catalog and moving
+between problems cost the same however many or however large the boards are.
+"""
+import mmap
+import struct
+from io import BytesIO
+
+import numpy as np
+
+MAGIC = b'GRDC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQ')
+RECORD = struct.Struct('<6I')
+INDEX_ENTRY = struct.Struct('<QQ')
+
+
+class CatalogError(ValueError):
+    pass
+
+
+class Problem:
+    """One decoded catalog record."""
+
+    def __init__(self, rows, cols, start, exit, obstacles):
+        self.rows = rows
+        self.cols = cols
+        self.start = start
+        self.exit = exit
+        # Flat row-major bool array, one entry per cell
+        self.obstacles = obstacles
+
+    def obstacle_positions(self):
+        return [divmod(int(i), self.cols) for i in np.flatnonzero(self.obstacles)]
+
+    def to_dict(self):
+        """The dict shape used by the hard-coded problem lists."""
+        config = {
+            'rows': self.rows,
+            'cols': self.cols,
+            'start': self.start,
+            'exit': self.exit,
+            'obstacles': self.obstacle_positions()
+        }
+        if self.rows == self.cols:
+            config['n'] = self.rows
+        return config
+
+
+def _bitmap(config):
+    rows = config.get('rows', config.get('n'))
+    cols = config.get('cols', config.get('n'))
+    if 'bitmap' in config:
+        bitmap = np.asarray(config['bitmap'], dtype=np.bool_).reshape(-1)
+    else:
+        bitmap = np.zeros(rows * cols, dtype=np.bool_)
+        for row, col in config.get('obstacles', ()):
+            bitmap[row * cols + col] = True
+    if bitmap.size != rows * cols:
+        raise CatalogError(f'Bitmap has {bitmap.size} cells, expected {rows}x{cols}')
+    return rows, cols, bitmap
+
+
+def _write(f, problems):
+    index = []
+    f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+    for config in problems:
+        rows, cols, bitmap = _bitmap(config)
+        offset = f.tell()
+        f.write(RECORD.pack(rows, cols, *config['start'], *config['exit']))
+        f.write(np.packbits(bitmap).tobytes())
+        index.append((offset, f.tell() - offset))
+    index_offset = f.tell()
+    for entry in index:
+        f.write(INDEX_ENTRY.pack(*entry))
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, 0, len(index), index_offset))
+    return len(index)
+
+
+def write_catalog(path, problems):
+    """Write problems to ``path`` and return how many were written.
+
+    Each problem is a dict with 'n' or 'rows'/'cols', 'start', 'exit' and
+    either an 'obstacles' list of (row, col) or a 'bitmap' bool array.
+    ``problems`` may be a generator; records are streamed to disk.
+    """
+    with open(path, 'wb') as f:
+        return _write(f, problems)
+
+
+class Catalog:
+    """Lazily decoded view over catalog bytes (usually an mmap)."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        magic, version, _, count, index_offset = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise CatalogError('Not a problem catalog')
+        if version != VERSION:
+            raise CatalogError(f'Unsupported catalog version {version}')
+        self._count = count
+        self._index = np.frombuffer(
+            buffer, dtype='<u8', count=2 * count, offset=index_offset
+        ).reshape(count, 2)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_problems(cls, problems):
+        """In-memory catalog, e.g. for a small hard-coded problem list."""
+        buffer = BytesIO()
+        _write(buffer, problems)
+        return cls(buffer.getvalue())
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, number):
+        if not 0 <= number < self._count:
+            raise IndexError(f'Problem {number} is not in the catalog')
+        return int(self._index[number, 0])
+
+    def info(self, number):
+        """Size, start and exit of a problem without decoding its bitmap."""
+        rows, cols, start_row, start_col, exit_row, exit_col = RECORD.unpack_from(
+            self._buffer, self._offset(number)
+        )
+        return {
+            'id': number,
+            'rows': rows,
+            'cols': cols,
+            'start': (start_row, start_col),
+            'exit': (exit_row, exit_col)
+        }
+
+    def __getitem__(self, number):
+        info = self.info(number)
+        rows, cols = info['rows'], info['cols']
+        packed = np.frombuffer(
+            self._buffer, dtype=np.uint8, count=(rows * cols + 7) // 8,
+            offset=self._offset(number) + RECORD.size
+        )
+        obstacles = np.unpackbits(packed, count=rows * cols).view(np.bool_)
+        return Problem(rows, cols, info['start'], info['exit'], obstacles)
@@ -0,0 +1,34 @@
+// Rebuilds full frames from a delta response ({ keyframe, patches }):
+// each patch is a small PNG drawn at (x, y) over the previous frame.
+
+const loadImage = (data) => new Promise((resolve, reject) => {
+  const img = new Image();
+  img.onload = () => resolve(img);
+  img.onerror = reject;
+  img.src = `data:image/png;base64,${data}`;
+});
+
+export const decodeDelta = async ({ keyframe, patches }) => {
+  if (!keyframe) return [];
+  const [base, ...images] = await Promise.all([
+    loadImage(keyframe),
+    ...patches.map(patch => (patch ? loadImage(patch.data) : null))
+  ]);
+
+  const canvas = document.createElement('canvas');
+  canvas.width = base.width;
+  canvas.height = base.height;
+  const ctx = canvas.getContext('2d');
+  ctx.drawImage(base, 0, 0);
+
+  const frames = [keyframe];
+  patches.forEach((patch, i) => {
+    if (patch) {
+      ctx.drawImage(images[i], patch.x, patch.y);
+      frames.push(canvas.toDataURL('image/png').split(',')[1]);
+    } else {
+      frames.push(frames[frames.length - 1]);
+    }
+  });
+  return frames;
+};
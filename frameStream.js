@@ -0,0 +1,17 @@
+// Consumes the Server-Sent Events frame streams (/api/start/stream,
+// /api/animate/stream): `meta` once, `frame` per frame, then `done`.
+// Cross-origin streams need `withCredentials` to keep the session cookie.
+export const streamFrames = (url, { onMeta, onFrame, onDone, withCredentials = false }) => {
+  const source = new EventSource(url, { withCredentials });
+  const finish = () => {
+    source.close();
+    if (onDone) onDone();
+  };
+  source.addEventListener('meta', e => {
+    if (onMeta) onMeta(JSON.parse(e.data));
+  });
+  source.addEventListener('frame', e => onFrame(JSON.parse(e.data).frame));
+  source.addEventListener('done', finish);
+  source.onerror = finish;
+  return source;
+};
@@ -0,0 +1,28 @@
+"""Worker process of frames.encode_frames.
+
+Started by frames as a script, so its __main__ is this file and it imports
+only frames, never the app. Reads one JSON job per line on stdin,
+[shared memory name, offset, size, [width, height]], and answers each with
+one JSON line: {"frame": base64 PNG} or {"error": message}. Exits when
+stdin closes, i.e. when the app process goes away.
+"""
+import json
+import sys
+
+import frames
+
+
+def main():
+    # Keep stray prints off the reply channel
+    replies, sys.stdout = sys.stdout, sys.stderr
+    for line in sys.stdin:
+        try:
+            reply = {'frame': frames.encode_shared(*json.loads(line))}
+        except Exception as error:
+            reply = {'error': repr(error)}
+        replies.write(json.dumps(reply) + '\n')
+        replies.flush()
+
+
+if __name__ == '__main__':
+    main()
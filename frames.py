@@ -0,0 +1,228 @@
+import base64
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pygame
+
+from timing import record, span
+
+# Sequences shorter than this are encoded in-process; the pool round trip
+# costs more than it saves for a handful of frames.
+POOL_THRESHOLD = 8
+POOL_WORKERS = os.cpu_count() or 1
+# Frames handed to the workers and not yet collected; each holds one
+# shared memory slot, so this also bounds what sits in /dev/shm
+POOL_WINDOW = 2 * POOL_WORKERS
+
+# Worker processes run this file as their __main__, so they import this
+# module but never the app that started them
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frame_worker.py')
+
+_pool = None
+_pool_lock = threading.Lock()
+# One worker process per pool thread
+_worker = threading.local()
+
+
+def png_bytes(surface):
+    with span('encode'):
+        buffer = BytesIO()
+        pygame.image.save(surface, buffer, "PNG")
+        return buffer.getvalue()
+
+
+def encode_png(surface):
+    """PNG-encode a surface and return it as a base64 string."""
+    data = png_bytes(surface)
+    with span('serialise'):
+        return base64.b64encode(data).decode('utf-8')
+
+
+def encode_shared(name, offset, size, dimensions):
+    """Worker side of encode_frames: PNG-encode one RGB frame from shared memory."""
+    shm = shared_memory.SharedMemory(name=name)
+    # The segment belongs to the app process, which unlinks it; this
+    # process must not clean it up on exit
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    try:
+        raw = bytes(shm.buf[offset:offset + size])
+    finally:
+        shm.close()
+    return encode_png(pygame.image.frombytes(raw, dimensions, 'RGB'))
+
+
+def _encode_remote(name, offset, size, dimensions):
+    """Runs on a pool thread: have this thread's worker process encode one frame."""
+    process = getattr(_worker, 'process', None)
+    if process is None or process.poll() is not None:
+        env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+        process = _worker.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, env=env
+        )
+    process.stdin.write(json.dumps([name, offset, size, dimensions]) + '\n')
+    process.stdin.flush()
+    reply = process.stdout.readline()
+    if not reply:
+        raise RuntimeError('Frame worker exited')
+    reply = json.loads(reply)
+    if 'error' in reply:
+        raise RuntimeError(f'Frame worker failed: {reply["error"]}')
+    return reply['frame']
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix='frame-worker')
+    return _pool
+
+
+def encode_frames(surfaces):
+    """PNG/base64-encode a sequence of frames, in order, on a worker pool.
+
+    Each surface is snapshotted as it is iterated, so callers may yield the
+    same surface repeatedly while drawing on it between frames. Without a
+    pool, frames are encoded one at a time as they are drawn. With one, the
+    first POOL_THRESHOLD frames are held to see whether the sequence is long
+    enough; after that every frame is copied into a free shared memory slot
+    as soon as it is drawn and handed to a worker, with at most POOL_WINDOW
+    frames in flight.
+    """
+    results = []
+    held = []
+    # (future, slot) in frame order; free and all shared memory slots
+    pending = deque()
+    free = []
+    slots = []
+    rendering = 0.0
+
+    def collect():
+        future, slot = pending.popleft()
+        results.append(future.result())
+        free.append(slot)
+
+    def submit(raw, size):
+        if len(pending) >= POOL_WINDOW:
+            collect()
+        slot = free.pop() if free else None
+        if slot is None or slot.size < len(raw):
+            if slot is not None:
+                slots.remove(slot)
+                slot.close()
+                slot.unlink()
+            slot = shared_memory.SharedMemory(create=True, size=len(raw))
+            slots.append(slot)
+        slot.buf[:len(raw)] = raw
+        pending.append((_get_pool().submit(_encode_remote, slot.name, 0, len(raw), size), slot))
+
+    try:
+        frames = iter(surfaces)
+        while True:
+            # Drawing happens as the (often lazy) sequence is iterated
+            began = time.perf_counter()
+            surface = next(frames, None)
+            rendering += time.perf_counter() - began
+            if surface is None:
+                break
+            if POOL_WORKERS < 2:
+                results.append(encode_png(surface))
+                continue
+            raw = (pygame.image.tobytes(surface, 'RGB'), surface.get_size())
+            if held is None:
+                submit(*raw)
+                continue
+            held.append(raw)
+            if len(held) == POOL_THRESHOLD:
+                for frame in held:
+                    submit(*frame)
+                held = None
+        record('render', rendering)
+
+        if held:
+            results.extend(encode_png(pygame.image.frombytes(raw, size, 'RGB')) for raw, size in held)
+        with span('encode'):
+            while pending:
+                collect()
+        return results
+    finally:
+        # Workers may still be reading the slots if something failed
+        futures = [future for future, _ in pending]
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        for slot in slots:
+            slot.close()
+            slot.unlink()
+
+
+# Keep proxies from buffering the stream and clients from caching it
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def _pixels(surface):
+    width, height = surface.get_size()
+    return np.frombuffer(pygame.image.tobytes(surface, 'RGB'), dtype=np.uint8).reshape(height, width, 3)
+
+
+def changed_rect(previous, current):
+    """Bounding pygame.Rect of the pixels that differ, or None if identical."""
+    changed = np.any(_pixels(previous) != _pixels(current), axis=2)
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    return pygame.Rect(int(cols[0]), int(rows[0]),
+                       int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+
+def encode_patch(surface, rect):
+    """Encode the given area of a surface as a positioned PNG patch.
+
+    Returns None when there is nothing to send: no rect, or a rect that
+    lies entirely outside the surface.
+    """
+    if rect is None:
+        return None
+    rect = pygame.Rect(rect).clip(surface.get_rect())
+    if not rect.w or not rect.h:
+        return None
+    return {
+        'x': rect.x,
+        'y': rect.y,
+        'w': rect.w,
+        'h': rect.h,
+        'data': encode_png(surface.subsurface(rect))
+    }
+
+
+def encode_delta(surfaces):
+    """Encode a frame sequence as one keyframe plus per-step patches.
+
+    Each patch covers only the rectangle that changed since the previous
+    frame; a step that changes nothing is sent as None.
+    """
+    with span('render'):
+        surfaces = list(surfaces)
+    if not surfaces:
+        return {'keyframe': None, 'patches': []}
+    patches = [
+        encode_patch(current, changed_rect(previous, current))
+        for previous, current in zip(surfaces, surfaces[1:])
+    ]
+    return {'keyframe': encode_png(surfaces[0]), 'patches': patches}
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+
+from flask import Response, abort, request
+
+from lru import LRUCache
+
+# One year; a stored frame never changes because its URL is its hash
+MAX_AGE = 365 * 24 * 3600
+# Default budget of a store, in PNG bytes
+MAX_BYTES = 256 << 20
+
+
+class FrameStore:
+    """Content-addressed PNG store: frames are keyed by their SHA-256.
+
+    The store is bounded by the bytes it holds. One response's frames, put
+    with put_all, may take at most a quarter of it, so they outlive a few
+    other responses' frames while the client fetches them.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, maxsize=1 << 16):
+        self._frames = LRUCache(maxsize, max_bytes=max_bytes)
+        self.max_response_bytes = max_bytes // 4
+
+    def __contains__(self, digest):
+        return digest in self._frames
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        self._frames.put(digest, data)
+        return digest
+
+    def put_base64(self, frame):
+        return self.put(base64.b64decode(frame))
+
+    def put_all(self, frames):
+        """Store base64 frames together and return their digests.
+
+        Returns None, storing nothing, when they are too large to be kept
+        until a client has fetched them; send them inline instead.
+        """
+        frames = [base64.b64decode(frame) for frame in frames]
+        if sum(map(len, frames)) > self.max_response_bytes or len(frames) > self._frames.maxsize // 4:
+            return None
+        # put moves frames already stored to the most recently used end
+        return [self.put(frame) for frame in frames]
+
+    def get(self, digest):
+        return self._frames.get(digest)
+
+    def stats(self):
+        return self._frames.stats()
+
+
+def frame_url(digest):
+    return f'/frames/{digest}.png'
+
+
+def register_frame_routes(app, store):
+    """Serve ``store`` at /frames/<digest>.png with strong ETags."""
+
+    @app.route('/frames/<digest>.png')
+    def get_stored_frame(digest):
+        data = store.get(digest)
+        # The digest is the content, so a client revalidating it still has
+        # the right frame even once the store has evicted it
+        if data is None and digest not in request.if_none_match:
+            abort(404)
+        response = Response(data or b'', mimetype='image/png')
+        response.set_etag(digest)
+        response.cache_control.public = True
+        response.cache_control.max_age = MAX_AGE
+        response.cache_control.immutable = True
+        # Answers If-None-Match with an empty 304
+        return response.make_conditional(request)
+
+    return get_stored_frame
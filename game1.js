@@ -1,18 +1,44 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { SceneCanvas, sceneSteps } from './sceneRenderer';
 
-const TreeVisualizer = () => {
+// The API is cross-origin: send the session cookie with every request, or
+// each one would start a new session
+const api = axios.create({ baseURL: 'http://localhost:5000', withCredentials: true });
+
+// With `vector`, the trees are drawn client-side from /api/scene instead of
+// server-rendered PNG frames.
+const TreeVisualizer = ({ vector = false }) => {
   const [currentFrame, setCurrentFrame] = useState('');
   const [animationFrames, setAnimationFrames] = useState([]);
   const [animating, setAnimating] = useState(false);
+  const [scene, setScene] = useState(null);
+  const [step, setStep] = useState(0);
 
   useEffect(() => {
+    if (vector) {
+      api.get('/api/scene').then(res => setScene(res.data));
+      return;
+    }
     // Load initial frame
-    axios.get('http://localhost:5000/api/init').then(res => {
+    api.get('/api/init').then(res => {
       setCurrentFrame(res.data.frame);
     });
   }, []);
 
+  useEffect(() => {
+    if (vector && animating) {
+      const timer = setInterval(() => {
+        setStep(prev => {
+          const next = prev + 1;
+          if (next >= sceneSteps(scene)) setAnimating(false);
+          return next;
+        });
+      }, 500);
+      return () => clearInterval(timer);
+    }
+  }, [vector, animating, scene]);
+
   useEffect(() => {
     if (animating && animationFrames.length > 0) {
       const timer = setInterval(() => {
@@ -28,7 +54,12 @@ const TreeVisualizer = () => {
   }, [animating, animationFrames]);
 
   const handleSolve = () => {
-    axios.get('http://localhost:5000/api/solve').then(res => {
+    if (vector) {
+      setStep(0);
+      setAnimating(true);
+      return;
+    }
+    api.get('/api/solve').then(res => {
       setAnimationFrames(res.data.frames);
       setAnimating(true);
     });
@@ -54,11 +85,19 @@ const TreeVisualizer = () => {
         </button>
       </div>
       
-      <img 
-        src={`data:image/png;base64,${currentFrame}`} 
-        alt="tree visualization"
-        style={{ border: '1px solid #ddd', borderRadius: '5px' }}
-      />
+      {vector ? (
+        <SceneCanvas
+          scene={scene}
+          step={step}
+          style={{ border: '1px solid #ddd', borderRadius: '5px' }}
+        />
+      ) : (
+        <img 
+          src={`data:image/png;base64,${currentFrame}`} 
+          alt="tree visualization"
+          style={{ border: '1px solid #ddd', borderRadius: '5px' }}
+        />
+      )}
     </div>
   );
 };
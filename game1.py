@@ -1,13 +1,17 @@
 import pygame
-import base64
-from io import BytesIO
-from flask import Flask, jsonify
+import threading
+from flask import Flask, jsonify, request
 from flask_cors import CORS
+from frames import encode_png, encode_frames
+from sessions import create_store, install as install_sessions
+from metrics import METRICS_ENDPOINT, span, install as install_metrics
+from subarray import MaxSubarrayTree, kadane
+from lru import LRUCache
 import os
 
 # Initialize Pygame in headless mode
-# os.environ['SDL_VIDEODRIVER'] = 'dummy'
-# pygame.init()
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+pygame.init()
 
 # Constants
 WIDTH = 800
@@ -24,19 +28,66 @@ GREEN = (0, 200, 0)
 RED = (200, 0, 0)
 GRAY = (150, 150, 150)
 
-# Problem data
+# Problem data; the solution is the maximum subarray of the values
 TREE_VALUES = [1, -2, 3, 4, -1, 2, 1, -5, 4]
-SOLUTION_INDICES = [2, 3, 4, 5, 6]
+_, _start, _end = kadane(TREE_VALUES)
+SOLUTION_INDICES = range(_start, _end + 1)
+
+# Values are edited live through /api/values; the segment tree keeps the
+# solution and range queries at O(log n) per edit. values_version lets
+# sessions notice that their solution frames are stale. Everything here is
+# read and written under values_lock; readers work on a snapshot().
+solver = MaxSubarrayTree(TREE_VALUES)
+values_lock = threading.Lock()
+values_version = 0
+MAX_VALUES = 1 << 24
+# Keeps every sum of up to MAX_VALUES values well inside int64
+MAX_ABS_VALUE = 1 << 31
+
+def visible_range(total):
+    """Indices of the trees of a row of total that land on the canvas.
+
+    The row is centred, so long rows overflow on both sides; one extra tree
+    is kept at each edge for value labels wider than their tree.
+    """
+    start_x = (WIDTH - total * TREE_SPACING) // 2
+    first = (-TREE_WIDTH - start_x) // TREE_SPACING
+    stop = -((start_x - WIDTH) // TREE_SPACING) + 1
+    return range(max(first, 0), min(stop, total))
+
+def snapshot():
+    """(values, first, total, solution indices, version), read together.
+
+    Only the trees that can appear on the canvas are copied: values are
+    those from index first on, out of total, and the solution is clipped
+    to them.
+    """
+    with values_lock:
+        visible = visible_range(len(TREE_VALUES))
+        solution = range(max(SOLUTION_INDICES[0], visible.start), min(SOLUTION_INDICES[-1] + 1, visible.stop))
+        return TREE_VALUES[visible.start:visible.stop], visible.start, len(TREE_VALUES), solution, values_version
 
 app = Flask(__name__)
-CORS(app)
+# Credentials let the cross-origin client keep its session cookie; they
+# need an explicit origin rather than "*"
+CORS(app, origins='http://localhost:3000', supports_credentials=True)
+install_metrics(app, 'trees')
 
-class TreeVisualizer:
+class ViewerState:
+    """Per-session progress through the solution animation."""
     def __init__(self):
         self.current_frame = 0
         self.frames = []
         self.solution_shown = False
-        
+        self.values_version = values_version
+
+    @property
+    def nbytes(self):
+        """Size of the cached frames, for the session byte budget."""
+        return sum(map(len, self.frames))
+
+class TreeVisualizer:
+    def __init__(self):
         # Load images or create fallback
         try:
             self.tree_img = pygame.image.load('tree.png')
@@ -51,82 +102,175 @@ class TreeVisualizer:
         self.marked_tree_img = pygame.transform.scale(self.marked_tree_img, (TREE_WIDTH, TREE_HEIGHT))
         
         self.font = pygame.font.Font(None, FONT_SIZE)
+        # Rendered value labels, shared by every frame
+        self.labels = LRUCache(4096)
 
-    def generate_base_frame(self):
+    def label(self, value):
+        text = self.labels.get(value)
+        if text is None:
+            text = self.font.render(str(value), True, BLACK)
+            self.labels.put(value, text)
+        return text
+
+    def generate_base_frame(self, values, first=0, total=None):
+        """Draw the row; values are the trees from index first on, out of total."""
         surface = pygame.Surface((WIDTH, HEIGHT))
         surface.fill(WHITE)
         
-        # Calculate starting position for centering
-        total_width = len(TREE_VALUES) * TREE_SPACING
-        start_x = (WIDTH - total_width) // 2
-        
-        # Draw all trees
-        for i, value in enumerate(TREE_VALUES):
-            x = start_x + i * TREE_SPACING
-            y = (HEIGHT - TREE_HEIGHT) // 2
+        # Draw all trees, centred as a row of total
+        for value, (x, y) in zip(values, tree_positions(len(values), first, total)):
             surface.blit(self.tree_img, (x, y))
             
             # Draw value
-            text = self.font.render(str(value), True, BLACK)
+            text = self.label(value)
             text_rect = text.get_rect(center=(x + TREE_WIDTH//2, y + TREE_HEIGHT + 20))
             surface.blit(text, text_rect)
             
         return surface
 
-    def generate_solution_frames(self):
-        base_surface = self.generate_base_frame()
-        frames = []
+    def generate_solution_frames(self, values=None, solution=None, first=0, total=None):
+        if values is None:
+            values, first, total, solution, _ = snapshot()
+        # Frames are drawn lazily, inside encode_frames' render stage
+        return encode_frames(self.solution_surfaces(values, solution, first, total))
+
+    def solution_surfaces(self, values, solution, first=0, total=None):
+        # Each frame is the previous one plus one newly marked tree;
+        # encode_frames snapshots the surface every time it is yielded.
+        # Only solution trees on the canvas get a frame, so a long row
+        # animates at most the trees in view.
+        frame = self.generate_base_frame(values, first, total)
+        positions = tree_positions(len(values), first, total)
+        yield frame
         
-        # Generate animation frames
-        for i in range(len(SOLUTION_INDICES) + 1):
-            frame = base_surface.copy()
+        for idx in solution:
+            if 0 <= idx - first < len(values):
+                x, y = positions[idx - first]
+                
+                # Draw marked tree
+                frame.blit(self.marked_tree_img, (x, y))
+                
+                # Redraw value on top
+                text = self.label(values[idx - first])
+                text_rect = text.get_rect(center=(x + TREE_WIDTH//2, y + TREE_HEIGHT + 20))
+                frame.blit(text, text_rect)
             
-            # Mark trees up to current step
-            for idx in SOLUTION_INDICES[:i]:
-                if 0 <= idx < len(TREE_VALUES):
-                    # Calculate position
-                    start_x = (WIDTH - len(TREE_VALUES) * TREE_SPACING) // 2
-                    x = start_x + idx * TREE_SPACING
-                    y = (HEIGHT - TREE_HEIGHT) // 2
-                    
-                    # Draw marked tree
-                    frame.blit(self.marked_tree_img, (x, y))
-                    
-                    # Redraw value on top
-                    text = self.font.render(str(TREE_VALUES[idx]), True, BLACK)
-                    text_rect = text.get_rect(center=(x + TREE_WIDTH//2, y + TREE_HEIGHT + 20))
-                    frame.blit(text, text_rect)
-            
-            # Convert to base64
-            buffer = BytesIO()
-            pygame.image.save(frame, buffer, format="PNG")
-            frames.append(base64.b64encode(buffer.getvalue()).decode('utf-8'))
-        
-        return frames
+            yield frame
 
+# Rendering resources are shared; progress is per session
 tree_visualizer = TreeVisualizer()
+state = install_sessions(
+    app, create_store(ViewerState),
+    exempt={'get_values', 'set_values', 'query_subarray', METRICS_ENDPOINT}
+)
+
+def tree_positions(count, first=0, total=None):
+    """Top-left corner of trees first..first+count-1 of a centred row of total."""
+    total = count if total is None else total
+    start_x = (WIDTH - total * TREE_SPACING) // 2
+    y = (HEIGHT - TREE_HEIGHT) // 2
+    return [(start_x + i * TREE_SPACING, y) for i in range(first, first + count)]
 
 @app.route('/api/init')
 def initialize():
-    frame = tree_visualizer.generate_base_frame()
-    buffer = BytesIO()
-    pygame.image.save(frame, buffer, format="PNG")
+    values, first, total, _, _ = snapshot()
+    with span('render'):
+        frame = tree_visualizer.generate_base_frame(values, first, total)
     return jsonify({
-        'frame': base64.b64encode(buffer.getvalue()).decode('utf-8'),
-        'totalTrees': len(TREE_VALUES)
+        'frame': encode_png(frame),
+        'totalTrees': total
     })
 
 @app.route('/api/solve')
 def show_solution():
-    if not tree_visualizer.solution_shown:
-        tree_visualizer.frames = tree_visualizer.generate_solution_frames()
-        tree_visualizer.current_frame = 0
-        tree_visualizer.solution_shown = True
+    values, first, total, solution, version = snapshot()
+    if not state.solution_shown or state.values_version != version:
+        state.frames = tree_visualizer.generate_solution_frames(values, solution, first, total)
+        state.current_frame = 0
+        state.solution_shown = True
+        state.values_version = version
     
     return jsonify({
-        'frames': tree_visualizer.frames,
-        'solution': SOLUTION_INDICES
+        'frames': state.frames,
+        'solution': list(solution)
+    })
+
+@app.route('/api/scene')
+def get_scene():
+    values, first, total, solution, _ = snapshot()
+    return jsonify({
+        'type': 'treeRow',
+        'width': WIDTH,
+        'height': HEIGHT,
+        'treeWidth': TREE_WIDTH,
+        'treeHeight': TREE_HEIGHT,
+        # Only the trees on the canvas, with their index in the full row
+        'trees': [
+            {'index': first + i, 'value': value, 'x': x, 'y': y}
+            for i, (value, (x, y)) in enumerate(zip(values, tree_positions(len(values), first, total)))
+        ],
+        'totalTrees': total,
+        'solution': list(solution)
     })
 
+def solution_fields():
+    best, start, end = solver.best()
+    return {'best': best, 'start': start, 'end': end, 'total': len(TREE_VALUES), 'version': values_version}
+
+def integer_values(values):
+    return isinstance(values, list) and all(type(v) is int and abs(v) < MAX_ABS_VALUE for v in values)
+
+@app.route('/api/values')
+def get_values():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 1000, type=int), 0), 100000)
+    with values_lock:
+        return jsonify({
+            **solution_fields(),
+            'values': TREE_VALUES[offset:offset + limit],
+            'offset': offset
+        })
+
+@app.route('/api/values', methods=['POST'])
+def set_values():
+    """Replace the values, or change some of them in place.
+
+    Body: {"values": [v, ...]} or {"updates": [[index, value], ...]}
+    """
+    global TREE_VALUES, SOLUTION_INDICES, solver, values_version
+    body = request.get_json(silent=True) or {}
+    with values_lock:
+        if 'values' in body:
+            values = body['values']
+            if not integer_values(values) or not 0 < len(values) <= MAX_VALUES:
+                return jsonify({'error': f'values must be 1 to {MAX_VALUES} integers below {MAX_ABS_VALUE} in magnitude'}), 400
+            solver = MaxSubarrayTree(values)
+            TREE_VALUES = values
+        else:
+            updates = body.get('updates')
+            if not isinstance(updates, list) or not all(
+                isinstance(u, list) and len(u) == 2 and integer_values(u) and 0 <= u[0] < len(TREE_VALUES)
+                for u in updates
+            ):
+                return jsonify({'error': 'updates must be [index, value] pairs of integers within the values'}), 400
+            for index, value in updates:
+                solver.update(index, value)
+                TREE_VALUES[index] = value
+        _, start, end = solver.best()
+        SOLUTION_INDICES = range(start, end + 1)
+        values_version += 1
+        return jsonify(solution_fields())
+
+@app.route('/api/query')
+def query_subarray():
+    """Maximum subarray within values[l..r], both inclusive."""
+    with values_lock:
+        left = request.args.get('l', 0, type=int)
+        right = request.args.get('r', len(TREE_VALUES) - 1, type=int)
+        if not 0 <= left <= right < len(TREE_VALUES):
+            return jsonify({'error': f'Need 0 <= l <= r < {len(TREE_VALUES)}'}), 400
+        best, start, end = solver.query(left, right)
+        return jsonify({'l': left, 'r': right, 'best': best, 'start': start, 'end': end})
+
 if __name__ == '__main__':
     app.run(port=5000)
\ No newline at end of file
@@ -1,17 +1,46 @@
 // React component (BSTVisualizer.jsx)
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
+import { decodeDelta } from './deltaPlayer';
+import { SceneCanvas, sceneSteps } from './sceneRenderer';
+import { streamFrames } from './frameStream';
 
-const BSTVisualizer = () => {
+const API = 'http://localhost:5000';
+// The API is cross-origin: send the session cookie with every request, or
+// each one would start a new session
+const api = axios.create({ baseURL: API, withCredentials: true });
+
+// currentFrame holds an image src: a cacheable /frames/<hash>.png URL for
+// the static tree, or a data URL for animation frames.
+const pngSrc = (frame) => `data:image/png;base64,${frame}`;
+
+// With `vector`, the tree is drawn client-side from /api/scene instead of
+// server-rendered PNG frames. With `stream`, frames are played as they
+// arrive from /api/animate/stream.
+const BSTVisualizer = ({ vector = false, stream = false }) => {
     const [currentFrame, setCurrentFrame] = useState('');
     const [animationFrames, setAnimationFrames] = useState([]);
     const [animating, setAnimating] = useState(false);
     const [currentExample, setCurrentExample] = useState(0);
     const [totalExamples, setTotalExamples] = useState(3);
+    const [scene, setScene] = useState(null);
+    const [step, setStep] = useState(0);
+    const streamOpen = useRef(false);
+
+    const loadScene = () => api.get('/api/scene').then(res => {
+        setScene(res.data);
+        setStep(sceneSteps(res.data));
+        setCurrentExample(res.data.currentExample);
+        setTotalExamples(res.data.totalExamples);
+    });
 
     useEffect(() => {
-        axios.get('http://localhost:5000/api/init').then(res => {
-            setCurrentFrame(res.data.frame);
+        if (vector) {
+            loadScene();
+            return;
+        }
+        api.get('/api/current', { params: { frames: 'ref' } }).then(res => {
+            setCurrentFrame(API + res.data.frameUrl);
             setTotalExamples(res.data.totalExamples);
         });
     }, []);
@@ -21,8 +50,8 @@ const BSTVisualizer = () => {
             const timer = setInterval(() => {
                 setAnimationFrames(prev => {
                     const [current, ...remaining] = prev;
-                    if (current) setCurrentFrame(current);
-                    if (remaining.length === 0) setAnimating(false);
+                    if (current) setCurrentFrame(pngSrc(current));
+                    if (remaining.length === 0 && !streamOpen.current) setAnimating(false);
                     return remaining;
                 });
             }, 500);
@@ -30,17 +59,53 @@ const BSTVisualizer = () => {
         }
     }, [animating, animationFrames]);
 
+    useEffect(() => {
+        if (vector && animating) {
+            const timer = setInterval(() => {
+                setStep(prev => {
+                    const next = prev + 1;
+                    if (next >= sceneSteps(scene)) setAnimating(false);
+                    return next;
+                });
+            }, 500);
+            return () => clearInterval(timer);
+        }
+    }, [vector, animating, scene]);
+
     const handleStart = () => {
-        axios.get('http://localhost:5000/api/start').then(res => {
-            setAnimationFrames(res.data.frames);
+        if (vector) {
+            setStep(1);
+            setAnimating(true);
+            return;
+        }
+        if (stream) {
+            streamOpen.current = true;
+            setAnimationFrames([]);
+            setAnimating(true);
+            streamFrames(`${API}/api/animate/stream`, {
+                withCredentials: true,
+                onFrame: frame => setAnimationFrames(prev => [...prev, frame]),
+                onDone: () => {
+                    streamOpen.current = false;
+                    setAnimationFrames(prev => {
+                        if (prev.length === 0) setAnimating(false);
+                        return prev;
+                    });
+                }
+            });
+            return;
+        }
+        api.get('/api/animate', { params: { mode: 'delta' } }).then(async res => {
+            setAnimationFrames(await decodeDelta(res.data));
             setAnimating(true);
         });
     };
 
     const handleNext = () => {
-        axios.get('http://localhost:5000/api/next').then(res => {
-            setCurrentFrame(res.data.frame);
+        api.get('/api/next', { params: { frames: 'ref' } }).then(res => {
+            setCurrentFrame(API + res.data.frameUrl);
             setCurrentExample(res.data.currentExample);
+            if (vector) loadScene();
         });
     };
 
@@ -63,15 +128,15 @@ const BSTVisualizer = () => {
                 </button>
             </div>
             
-            <img 
-                src={`data:image/png;base64,${currentFrame}`} 
-                alt="BST Visualization"
-                style={{ 
-                    border: '2px solid #333',
-                    borderRadius: '10px',
-                    boxShadow: '0 4px 8px rgba(0,0,0,0.1)'
-                }}
-            />
+            {vector ? (
+                <SceneCanvas scene={scene} step={step} style={frameStyle} />
+            ) : (
+                <img 
+                    src={currentFrame} 
+                    alt="BST Visualization"
+                    style={frameStyle}
+                />
+            )}
             
             <div style={{ marginTop: '20px', fontSize: '1.2em' }}>
                 Example {currentExample + 1} of {totalExamples}
@@ -80,6 +145,12 @@ const BSTVisualizer = () => {
     );
 };
 
+const frameStyle = {
+    border: '2px solid #333',
+    borderRadius: '10px',
+    boxShadow: '0 4px 8px rgba(0,0,0,0.1)'
+};
+
 const buttonStyle = (disabled) => ({
     padding: '10px 20px',
     fontSize: '16px',
@@ -1,9 +1,13 @@
 # server.py
 import pygame
 import base64
-from io import BytesIO
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from frames import encode_png, encode_delta, encode_frames, png_bytes, sse_event, SSE_HEADERS
+from framestore import FrameStore, frame_url, register_frame_routes
+from lru import LRUCache
+from sessions import create_store, install as install_sessions
+from metrics import METRICS_ENDPOINT, span, install as install_metrics
 import os
 
 # Pygame headless setup
@@ -16,7 +20,9 @@ NODE_SIZE = 60
 FONT_SIZE = 24
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins":"http://localhost:3000"}})
+# Credentials let the cross-origin client keep its session cookie
+CORS(app, resources={r"/*": {"origins":"http://localhost:3000"}}, supports_credentials=True)
+install_metrics(app, 'bst')
 
 class TreeNode:
     def __init__(self, val):
@@ -33,7 +39,6 @@ class BSTAnimator:
             [4, 10, 15, 20, 25, 30, 35],
             [5, 15, 25, 35, 45, 55, 65]
         ]
-        self.current_example = 0
         self.font = pygame.font.SysFont('freesansbold.ttf', FONT_SIZE)
         self.leaf_img = self._load_leaf_image()
         self.bg_img = self._load_background()
@@ -97,12 +102,17 @@ class BSTAnimator:
             current_level = next_level
             depth -= 1
 
-    def generate_animation(self, arr):
-        sorted_arr = sorted(arr)
-        root = self._sorted_array_to_bst(sorted_arr)
-        self._assign_positions(root)
+    def build_tree(self, arr):
+        """Balanced BST of the values in ``arr`` with node positions assigned."""
+        with span('layout'):
+            root = self._sorted_array_to_bst(sorted(arr))
+            self._assign_positions(root)
+        return root
+
+    def animation_surfaces(self, arr):
+        """Yield the animation frames one level at a time."""
+        root = self.build_tree(arr)
         
-        frames = []
         queue = [root]
         
         while queue:
@@ -114,10 +124,7 @@ class BSTAnimator:
                 if node:
                     self._draw_node(frame, node)
             
-            # Convert to base64
-            buffer = BytesIO()
-            pygame.image.save(frame, buffer, "PNG")
-            frames.append(base64.b64encode(buffer.getvalue()).decode('utf-8'))
+            yield frame
             
             # Expand queue for next level
             next_level = []
@@ -125,8 +132,12 @@ class BSTAnimator:
                 if node:
                     next_level.extend([node.left, node.right])
             queue = next_level if any(next_level) else []
-        
-        return frames
+
+    def generate_animation(self, arr, delta=False):
+        frames = list(self.animation_surfaces(arr))
+        if delta:
+            return encode_delta(frames)
+        return encode_frames(frames)
 
     def _sorted_array_to_bst(self, arr):
         if not arr:
@@ -137,42 +148,119 @@ class BSTAnimator:
         root.right = self._sorted_array_to_bst(arr[mid+1:])
         return root
 
+class ExampleState:
+    """Per-session position in the example list."""
+    def __init__(self):
+        self.current_example = 0
+
+# Rendering resources are shared; the selected example is per session
 animator = BSTAnimator()
+state = install_sessions(app, create_store(ExampleState), exempt={'get_stored_frame', METRICS_ENDPOINT})
+
+# Rendered frames served from /frames/<hash>.png, and the hash of the full
+# tree frame per example array
+frame_store = FrameStore()
+current_frames = LRUCache(64)
+register_frame_routes(app, frame_store)
+
+def scene_nodes(root):
+    """Nodes in breadth-first order with their level and parent index."""
+    nodes = []
+    level = [(root, None)]
+    depth = 0
+    while level:
+        next_level = []
+        for node, parent in level:
+            if node:
+                nodes.append({
+                    'value': node.val,
+                    'x': node.x,
+                    'y': node.y,
+                    'level': depth,
+                    'parent': parent
+                })
+                index = len(nodes) - 1
+                next_level.extend([(node.left, index), (node.right, index)])
+        level = next_level
+        depth += 1
+    return nodes
+
+def render_current():
+    root = animator.build_tree(animator.example_arrays[state.current_example])
+    
+    with span('render'):
+        surface = animator.bg_img.copy()
+        
+        # Draw all nodes
+        def draw_all(node):
+            if node:
+                animator._draw_node(surface, node)
+                draw_all(node.left)
+                draw_all(node.right)
+        draw_all(root)
+    return surface
 
 @app.route('/api/current')
 def get_current_state():
-    surface = animator.bg_img.copy()
-    arr = sorted(animator.example_arrays[animator.current_example])
-    root = animator._sorted_array_to_bst(arr)
-    animator._assign_positions(root)
-    
-    # Draw all nodes
-    def draw_all(node):
-        if node:
-            animator._draw_node(surface, node)
-            draw_all(node.left)
-            draw_all(node.right)
-    draw_all(root)
+    # The full-tree frame only depends on the example array
+    key = tuple(animator.example_arrays[state.current_example])
+    digest = current_frames.get(key)
+    data = frame_store.get(digest) if digest is not None else None
+    if data is None:
+        data = png_bytes(render_current())
+        digest = frame_store.put(data)
+        current_frames.put(key, digest)
     
-    buffer = BytesIO()
-    pygame.image.save(surface, buffer, "PNG")
+    if request.args.get('frames') == 'ref':
+        frame = {'frameHash': digest, 'frameUrl': frame_url(digest)}
+    else:
+        frame = {'frame': base64.b64encode(data).decode('utf-8')}
     return jsonify({
-        'frame': base64.b64encode(buffer.getvalue()).decode('utf-8'),
-        'currentExample': animator.current_example,
+        **frame,
+        'currentExample': state.current_example,
         'totalExamples': len(animator.example_arrays)
     })
 
 @app.route('/api/animate')
 def start_animation():
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'delta'):
+        return jsonify({'error': f'Unknown mode: {mode}', 'modes': ['full', 'delta']}), 400
     frames = animator.generate_animation(
-        animator.example_arrays[animator.current_example]
+        animator.example_arrays[state.current_example], delta=mode == 'delta'
     )
+    if mode == 'delta':
+        return jsonify({'mode': mode, **frames})
     return jsonify({'frames': frames})
 
+@app.route('/api/animate/stream')
+def stream_animation():
+    arr = animator.example_arrays[state.current_example]
+    
+    def events():
+        for frame in animator.animation_surfaces(arr):
+            yield sse_event('frame', {'frame': encode_png(frame)})
+        yield sse_event('done', {})
+    
+    return Response(events(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/api/scene')
+def get_scene():
+    root = animator.build_tree(animator.example_arrays[state.current_example])
+    return jsonify({
+        'type': 'bst',
+        'width': WIDTH,
+        'height': HEIGHT,
+        'nodeSize': NODE_SIZE,
+        'nodes': scene_nodes(root),
+        'currentExample': state.current_example,
+        'totalExamples': len(animator.example_arrays)
+    })
+
 @app.route('/api/next')
 def next_example():
-    if animator.current_example < len(animator.example_arrays) - 1:
-        animator.current_example += 1
+    if state.current_example < len(animator.example_arrays) - 1:
+        state.current_example += 1
     return get_current_state()
 
 if __name__ == '__main__':
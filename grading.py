@@ -0,0 +1,173 @@
+"""Bulk validation of submitted paths, without opening a window.
+
+Submissions are JSON lines, one per line:
+
+    {"id": "s1", "problem": 0, "path": [[0, 0], [0, 1], ...]}
+
+Each path is checked against its board with whole-array operations: every
+step inside the board, no step on an obstacle, every move to a 4-connected
+neighbour, starting on the start cell and ending on the exit. A valid path
+is optimal when it is as short as the dijkstra path; the optimal length is
+worked out once per board and worker. One JSON line is written per
+submission, in input order:
+
+    {"id": "s1", "problem": 0, "valid": false, "optimal": false,
+     "length": 9, "optimal_length": 8, "errors": {"obstacle": 3}}
+
+``errors`` maps every failed check to the first offending step (an index
+into the path), or null for 'format', 'problem' and 'empty', which are not
+about one step. A path is only well-formed if every step is a [row, col]
+pair of JSON integers. Lines are validated in chunks on a process pool.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import search
+from catalog import Catalog
+from grid_engine import Grid
+from lru import LRUCache
+
+CHUNK_LINES = 2048
+WORKERS = os.cpu_count() or 1
+
+# Per process: the catalog being graded and (problem, optimal length) per board
+_catalog = None
+_boards = LRUCache(256)
+
+
+def _init(catalog_path, problems):
+    global _catalog
+    _catalog = Catalog.open(catalog_path) if catalog_path else Catalog.from_problems(problems)
+    _boards.clear()
+
+
+def optimal_length(problem):
+    """Moves on the dijkstra path of a catalog problem, or None if the exit is unreachable."""
+    grid = Grid(problem.rows, problem.cols)
+    grid.obstacles[:] = problem.obstacles
+    grid.start = grid.get_cell(*problem.start)
+    grid.exit = grid.get_cell(*problem.exit)
+    path, _ = search.dijkstra(grid, problem.start)
+    return len(path) - 1 if path else None
+
+
+def _board(number):
+    board = _boards.get(number)
+    if board is None:
+        problem = _catalog[number]
+        board = (problem, optimal_length(problem))
+        _boards.put(number, board)
+    return board
+
+
+def validate(problem, path):
+    """Failed checks of one path on problem, as {check: first offending step}."""
+    if not isinstance(path, list) or not path:
+        return {'format' if not isinstance(path, list) else 'empty': None}
+    # Only [row, col] pairs of ints; NumPy would truncate floats and bools
+    if not all(isinstance(step, list) and len(step) == 2 and type(step[0]) is int and type(step[1]) is int
+               for step in path):
+        return {'format': None}
+    try:
+        steps = np.asarray(path, dtype=np.int64)
+    except OverflowError:
+        # Coordinates past int64 are off the board either way
+        limit = max(problem.rows, problem.cols)
+        steps = np.asarray([[min(max(v, -1), limit) for v in step] for step in path], dtype=np.int64)
+
+    rows, cols = steps[:, 0], steps[:, 1]
+    inside = (rows >= 0) & (rows < problem.rows) & (cols >= 0) & (cols < problem.cols)
+    blocked = inside & problem.obstacles[np.where(inside, rows * problem.cols + cols, 0)]
+    jumps = np.abs(np.diff(steps, axis=0)).sum(axis=1) != 1
+
+    errors = {}
+    # Move i goes from step i to step i + 1, so it is reported at i + 1
+    for check, failed, offset in (('bounds', ~inside, 0), ('obstacle', blocked, 0), ('adjacency', jumps, 1)):
+        first = np.flatnonzero(failed)
+        if first.size:
+            errors[check] = int(first[0]) + offset
+    if tuple(steps[0]) != tuple(problem.start):
+        errors['start'] = 0
+    if tuple(steps[-1]) != tuple(problem.exit):
+        errors['exit'] = len(steps) - 1
+    return errors
+
+
+def grade(submission):
+    """Result record of one decoded submission."""
+    number = submission.get('problem')
+    result = {'id': submission.get('id'), 'problem': number}
+    if type(number) is not int or not 0 <= number < len(_catalog):
+        return dict(result, valid=False, optimal=False, length=None, optimal_length=None, errors={'problem': None})
+    problem, optimal = _board(number)
+    path = submission.get('path')
+    errors = validate(problem, path)
+    length = len(path) - 1 if not errors else None
+    return dict(
+        result,
+        valid=not errors,
+        optimal=not errors and length == optimal,
+        length=length,
+        optimal_length=optimal,
+        errors=errors
+    )
+
+
+def _grade_lines(lines):
+    out = []
+    for line in lines:
+        try:
+            submission = json.loads(line)
+        except ValueError:
+            submission = None
+        if not isinstance(submission, dict):
+            record = {'id': None, 'problem': None, 'valid': False, 'optimal': False,
+                      'length': None, 'optimal_length': None, 'errors': {'format': None}}
+        else:
+            record = grade(submission)
+        out.append(json.dumps(record) + '\n')
+    return ''.join(out)
+
+
+def _chunks(f):
+    chunk = []
+    for line in f:
+        if line.strip():
+            chunk.append(line)
+            if len(chunk) == CHUNK_LINES:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade_file(source, dest, catalog_path=None, problems=None, workers=WORKERS):
+    """Grade every submission in the JSON lines file source into dest.
+
+    Boards come from the catalog file at catalog_path, or else from the
+    problem dicts in problems. Returns the number of submissions graded.
+    """
+    count = 0
+    with open(source) as src, open(dest, 'w') as out:
+        if workers <= 1:
+            _init(catalog_path, problems)
+            for chunk in _chunks(src):
+                out.write(_grade_lines(chunk))
+                count += len(chunk)
+            return count
+
+        with ProcessPoolExecutor(workers, initializer=_init, initargs=(catalog_path, problems)) as pool:
+            # A bounded window of chunks in flight keeps memory flat on large inputs
+            pending = deque()
+            for chunk in _chunks(src):
+                pending.append(pool.submit(_grade_lines, chunk))
+                count += len(chunk)
+                if len(pending) >= 2 * workers:
+                    out.write(pending.popleft().result())
+            while pending:
+                out.write(pending.popleft().result())
+    return count
@@ -1,27 +1,66 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
+import { decodeDelta } from './deltaPlayer';
+import { SceneCanvas, sceneSteps } from './sceneRenderer';
+import { streamFrames } from './frameStream';
 
-const GameViewer = () => {
+const CELL_SIZE = 40;
+
+// currentFrame holds an image src: a cacheable /frames/<hash>.png URL for
+// static boards, or a data URL for animation frames.
+const pngSrc = (frame) => `data:image/png;base64,${frame}`;
+
+// With `vector`, the board is drawn client-side from /api/scene instead of
+// server-rendered PNG frames. With `stream`, frames are played as they
+// arrive from /api/start/stream.
+const GameViewer = ({ vector = false, stream = false }) => {
   const [currentFrame, setCurrentFrame] = useState('');
   const [problemNum, setProblemNum] = useState(0);
+  const [totalProblems, setTotalProblems] = useState(3);
   const [animationFrames, setAnimationFrames] = useState([]);
   const [animating, setAnimating] = useState(false);
+  const [algorithm, setAlgorithm] = useState('dijkstra');
+  const [expanded, setExpanded] = useState(null);
+  const [scene, setScene] = useState(null);
+  const [step, setStep] = useState(0);
+  const streamOpen = useRef(false);
+
+  const loadScene = () => axios.get('/api/scene', { params: { algorithm } }).then(res => {
+    setScene(res.data);
+    setStep(0);
+    setExpanded(res.data.expanded);
+  });
 
   useEffect(() => {
     // Load initial frame
-    axios.get('/api/init').then(res => {
-      setCurrentFrame(res.data.frame);
+    axios.get('/api/init', { params: { frames: 'ref' } }).then(res => {
+      setCurrentFrame(res.data.frameUrl);
       setProblemNum(res.data.problem);
+      setTotalProblems(res.data.total_problems);
+      if (vector) loadScene();
     });
   }, []);
 
+  useEffect(() => {
+    if (vector && animating) {
+      const timer = setInterval(() => {
+        setStep(prev => {
+          const next = prev + 1;
+          if (next >= sceneSteps(scene)) setAnimating(false);
+          return next;
+        });
+      }, 500);
+      return () => clearInterval(timer);
+    }
+  }, [vector, animating, scene]);
+
   useEffect(() => {
     if (animating && animationFrames.length > 0) {
       const timer = setInterval(() => {
         setAnimationFrames(prev => {
           const [current, ...remaining] = prev;
-          setCurrentFrame(current);
-          if (remaining.length === 0) setAnimating(false);
+          setCurrentFrame(pngSrc(current));
+          if (remaining.length === 0 && !streamOpen.current) setAnimating(false);
           return remaining;
         });
       }, 500);
@@ -30,38 +69,96 @@ const GameViewer = () => {
   }, [animating, animationFrames]);
 
   const handleStart = () => {
-    axios.get('/api/start').then(res => {
-      setAnimationFrames(res.data.frames);
+    if (vector) {
+      loadScene().then(() => setAnimating(true));
+      return;
+    }
+    if (stream) {
+      streamOpen.current = true;
+      setAnimationFrames([]);
+      setAnimating(true);
+      streamFrames(`/api/start/stream?algorithm=${algorithm}`, {
+        onMeta: meta => setExpanded(meta.expanded),
+        onFrame: frame => setAnimationFrames(prev => [...prev, frame]),
+        onDone: () => {
+          streamOpen.current = false;
+          setAnimationFrames(prev => {
+            if (prev.length === 0) setAnimating(false);
+            return prev;
+          });
+        }
+      });
+      return;
+    }
+    axios.get('/api/start', { params: { algorithm, mode: 'delta' } }).then(async res => {
+      setExpanded(res.data.expanded);
+      setAnimationFrames(await decodeDelta(res.data));
       setAnimating(true);
     });
   };
 
+  const handleBoardClick = (e) => {
+    if (animating) return;
+    const rect = e.target.getBoundingClientRect();
+    const col = Math.floor((e.clientX - rect.left) / CELL_SIZE);
+    const row = Math.floor((e.clientY - rect.top) / CELL_SIZE);
+    axios.post('/api/obstacle', null, { params: { row, col } }).then(res => {
+      setCurrentFrame(pngSrc(res.data.frame));
+      setExpanded(res.data.expanded);
+      if (vector) loadScene();
+    }).catch(() => {});
+  };
+
   const handleNext = () => {
-    axios.get('/api/next').then(res => {
-      setCurrentFrame(res.data.frame);
+    axios.get('/api/next', { params: { frames: 'ref' } }).then(res => {
+      setCurrentFrame(res.data.frameUrl);
       setProblemNum(res.data.problem);
+      if (vector) loadScene();
     });
   };
 
   return (
     <div>
       <div style={{ position: 'relative' }}>
-        <img 
-          src={`data:image/png;base64,${currentFrame}`} 
-          alt="game frame"
-          style={{ border: '1px solid black' }}
-        />
+        {vector ? (
+          <SceneCanvas
+            scene={scene}
+            step={step}
+            onClick={handleBoardClick}
+            style={{ border: '1px solid black' }}
+          />
+        ) : (
+          <img 
+            src={currentFrame} 
+            alt="game frame"
+            onClick={handleBoardClick}
+            style={{ border: '1px solid black' }}
+          />
+        )}
         <div style={{ position: 'absolute', bottom: 10, left: '50%', transform: 'translateX(-50%)' }}>
+          <select
+            value={algorithm}
+            onChange={e => setAlgorithm(e.target.value)}
+            disabled={animating}
+            style={{ marginRight: 10 }}
+          >
+            <option value="dijkstra">Dijkstra</option>
+            <option value="astar">A*</option>
+            <option value="bibfs">Bidirectional BFS</option>
+            <option value="jps">Jump Point Search</option>
+            <option value="field">Distance field</option>
+          </select>
           <button onClick={handleStart} disabled={animating}>Start</button>
           <button 
             onClick={handleNext} 
-            disabled={problemNum >= 2 || animating}
+            disabled={problemNum >= totalProblems - 1 || animating}
             style={{ marginLeft: 10 }}
           >
             Next
           </button>
         </div>
       </div>
+      {expanded !== null && <div>Nodes expanded: {expanded}</div>}
     </div>
   );
 };
@@ -1,9 +1,19 @@
 import pygame
-import heapq
 import base64
-from io import BytesIO
-from flask import Flask, jsonify
+import time
+from flask import Flask, Response, abort, jsonify, request, stream_with_context
 from flask_cors import CORS  # Install with pip install flask-cors
+from grid_engine import Grid
+import search
+from frames import encode_png, encode_patch, encode_frames, png_bytes, sse_event, SSE_HEADERS
+from framestore import FrameStore, frame_url, register_frame_routes
+from lru import LRUCache
+from lpastar import LPAStar
+from sessions import create_store, install as install_sessions
+from catalog import Catalog
+from tiles import TilePyramid, TILE_SIZE
+from metrics import METRICS_ENDPOINT, span, install as install_metrics
+import multiagent
 
 # Initialize Pygame in headless mode
 import os
@@ -40,203 +50,640 @@ player_img = pygame.transform.scale(player_img, (CELL_SIZE, CELL_SIZE))
 obstacle_img = pygame.transform.scale(obstacle_img, (CELL_SIZE, CELL_SIZE))
 exit_img = pygame.transform.scale(exit_img, (CELL_SIZE, CELL_SIZE))
 
-class Cell:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.x = col * CELL_SIZE
-        self.y = row * CELL_SIZE
-        self.is_obstacle = False
-        self.neighbors = []
-        self.previous = None
-        self.distance = float('inf')
-
-    def draw(self, screen):
-        if self.is_obstacle:
-            screen.blit(obstacle_img, (self.x, self.y))
-
-class Grid:
-    def __init__(self, rows, cols):
-        self.rows = rows
-        self.cols = cols
-        self.grid = [[Cell(row, col) for col in range(cols)] for row in range(rows)]
-        self.start = None
-        self.exit = None
-
-    def get_cell(self, row, col):
-        if 0 <= row < self.rows and 0 <= col < self.cols:
-            return self.grid[row][col]
-        return None
-
-    def reset(self):
-        for row in self.grid:
-            for cell in row:
-                cell.distance = float('inf')
-                cell.previous = None
+BUILTIN_PROBLEMS = [
+    {
+        'n': 5,
+        'start': (0, 0),
+        'exit': (4, 4),
+        'obstacles': [(1, 1), (2, 2), (3, 3)]
+    },
+    {
+        'n': 6,
+        'start': (0, 5),
+        'exit': (5, 0),
+        'obstacles': [(1, 0), (2, 1), (3, 2), (4, 3)]
+    },
+    {
+        'n': 7,
+        'start': (3, 3),
+        'exit': (6, 6),
+        'obstacles': [(0, 0), (1, 1), (2, 2), (4, 4), (5, 5)]
+    }
+]
+
+# Problems come from the binary catalog named by PROBLEM_CATALOG (see
+# catalog.py), or from the built-in list above when it is not set
+if os.environ.get('PROBLEM_CATALOG'):
+    catalog = Catalog.open(os.environ['PROBLEM_CATALOG'])
+else:
+    catalog = Catalog.from_problems(BUILTIN_PROBLEMS)
 
 def create_problem(problem_num):
-    problems = [
-        {
-            'n': 5,
-            'start': (0, 0),
-            'exit': (4, 4),
-            'obstacles': [(1, 1), (2, 2), (3, 3)]
-        },
-        {
-            'n': 6,
-            'start': (0, 5),
-            'exit': (5, 0),
-            'obstacles': [(1, 0), (2, 1), (3, 2), (4, 3)]
-        },
-        {
-            'n': 7,
-            'start': (3, 3),
-            'exit': (6, 6),
-            'obstacles': [(0, 0), (1, 1), (2, 2), (4, 4), (5, 5)]
-        }
-    ]
-    return problems[problem_num]
+    return catalog[problem_num].to_dict()
 
 def dijkstra(grid, start):
-    grid.reset()
-    start_cell = grid.get_cell(*start)
-    start_cell.distance = 0
-    queue = [(0, start_cell.row, start_cell.col)]
-    
-    while queue:
-        current_dist, row, col = heapq.heappop(queue)
-        current_cell = grid.get_cell(row, col)
-        
-        if current_cell == grid.exit:
-            break
-            
-        for neighbor in current_cell.neighbors:
-            if neighbor.is_obstacle:
-                continue
-            new_dist = current_dist + 1
-            if new_dist < neighbor.distance:
-                neighbor.distance = new_dist
-                neighbor.previous = current_cell
-                heapq.heappush(queue, (new_dist, neighbor.row, neighbor.col))
-    
-    path = []
-    current = grid.exit
-    while current:
-        path.insert(0, (current.row, current.col))
-        current = current.previous
-    return path if grid.exit.distance != float('inf') else []
+    path, _ = search.dijkstra(grid, start)
+    return path
 
 app = Flask(__name__)
 CORS(app)
+install_metrics(app, 'graph')
 
 class GameState:
     def __init__(self):
         self.current_problem = 0
         self.grid = None
+        # Cells toggled by /api/obstacle since the problem was loaded
+        self.edits = set()
         self.path = []
-        self.frames = []
         self.game_over = False
+        self.planner = None
+        self.background = None
+        self.canvas = None
+
+    # Only what the player changed is kept between requests; the board,
+    # its distance field, the planner and the surfaces are rebuilt from the
+    # catalog by restore_session
+    PERSISTED = ('current_problem', 'edits', 'path', 'game_over')
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.PERSISTED}
+
+    def __setstate__(self, data):
+        self.__init__()
+        self.__dict__.update(data)
+
+    @property
+    def nbytes(self):
+        """Rough memory held by the rebuilt board, for the session byte budget."""
+        size = 0
+        if self.grid is not None:
+            arrays = [self.grid.obstacles, self.grid.distance, self.grid.previous, *(self.grid.field or ())]
+            size += sum(array.nbytes for array in arrays)
+        if self.planner is not None:
+            # A few dict and heap entries per touched cell
+            planner = self.planner
+            size += 100 * (len(planner.g) + len(planner.rhs) + len(planner.open) + len(planner.queue))
+        for surface in (self.background, self.canvas):
+            if surface is not None:
+                size += surface.get_bytesize() * surface.get_width() * surface.get_height()
+        return size
 
-state = GameState()
+# One GameState per user session, see restore_session for the `state` proxy
+session_store = create_store(GameState)
 
-def setup_grid(problem_num):
-    config = create_problem(problem_num)
-    n = config['n']
-    state.grid = Grid(n, n)
+# (board fingerprint, algorithm, mode) -> (path, expanded, frames)
+PATH_CACHE_SIZE = 256
+path_cache = LRUCache(PATH_CACHE_SIZE)
+
+# Rendered frames served from /frames/<hash>.png, and the hash of the plain
+# board frame per board fingerprint
+frame_store = FrameStore()
+board_frames = LRUCache(PATH_CACHE_SIZE)
+register_frame_routes(app, frame_store)
+
+# Board tiles for /api/tiles, shared by every session showing the same board
+tile_pyramid = TilePyramid(CELL_SIZE, obstacle_img, player_img, exit_img)
+
+def setup_grid(problem_num, edits=()):
+    problem = catalog[problem_num]
+    state.grid = Grid(problem.rows, problem.cols, CELL_SIZE)
     
     # Set start and exit
-    state.grid.start = state.grid.get_cell(*config['start'])
-    state.grid.exit = state.grid.get_cell(*config['exit'])
-    
-    # Set obstacles
-    for obstacle in config['obstacles']:
-        state.grid.get_cell(*obstacle).is_obstacle = True
-        
-    # Create neighbors
-    for row in state.grid.grid:
-        for cell in row:
-            cell.neighbors = []
-            if cell.row > 0:
-                neighbor = state.grid.get_cell(cell.row-1, cell.col)
-                if neighbor:
-                    cell.neighbors.append(neighbor)
-            if cell.row < state.grid.rows-1:
-                neighbor = state.grid.get_cell(cell.row+1, cell.col)
-                if neighbor:
-                    cell.neighbors.append(neighbor)
-            if cell.col > 0:
-                neighbor = state.grid.get_cell(cell.row, cell.col-1)
-                if neighbor:
-                    cell.neighbors.append(neighbor)
-            if cell.col < state.grid.cols-1:
-                neighbor = state.grid.get_cell(cell.row, cell.col+1)
-                if neighbor:
-                    cell.neighbors.append(neighbor)
+    state.grid.start = state.grid.get_cell(*problem.start)
+    state.grid.exit = state.grid.get_cell(*problem.exit)
+    
+    # Set obstacles, then replay the session's edits on top
+    state.grid.obstacles[:] = problem.obstacles
+    state.edits = set(edits)
+    if state.edits:
+        state.grid.obstacles[list(state.edits)] ^= True
+    
+    # Distances to the (fixed) exit and the incremental planner are built
+    # on first use
+    state.grid.field = None
+    state.planner = None
+    
+    # Static board layer shared by every frame of this problem
+    state.background = render_board()
+    state.canvas = state.background.copy()
 
-def generate_frame(highlight=None):
+def draw_cell(surface, row, col):
+    x, y = col * CELL_SIZE, row * CELL_SIZE
+    surface.fill(WHITE, (x, y, CELL_SIZE, CELL_SIZE))
+    if state.grid.obstacles[state.grid.index(row, col)]:
+        surface.blit(obstacle_img, (x, y))
+    pygame.draw.rect(surface, BLACK, (x, y, CELL_SIZE, CELL_SIZE), 1)
+    
+    # Draw start and exit
+    cell = state.grid.get_cell(row, col)
+    if cell == state.grid.start:
+        surface.blit(player_img, (x, y))
+    if cell == state.grid.exit:
+        surface.blit(exit_img, (x, y))
+
+def render_board():
     surface = pygame.Surface((WIDTH, HEIGHT))
     surface.fill(WHITE)
     
-    # Draw grid
-    for row in state.grid.grid:
-        for cell in row:
-            cell.draw(surface)
-            pygame.draw.rect(surface, BLACK, (cell.x, cell.y, CELL_SIZE, CELL_SIZE), 1)
+    # Draw grid; only the cells that fit on the canvas, larger boards are
+    # viewed through /api/tiles
+    rows = min(state.grid.rows, -(-HEIGHT // CELL_SIZE))
+    cols = min(state.grid.cols, -(-WIDTH // CELL_SIZE))
+    visible = state.grid.obstacles.reshape(state.grid.rows, state.grid.cols)[:rows, :cols]
+    for row, col in zip(*visible.nonzero()):
+        surface.blit(obstacle_img, (col * CELL_SIZE, row * CELL_SIZE))
+    for row in range(rows):
+        for col in range(cols):
+            pygame.draw.rect(surface, BLACK, (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
     
     # Draw start and exit
     if state.grid.start:
         surface.blit(player_img, (state.grid.start.x, state.grid.start.y))
     if state.grid.exit:
         surface.blit(exit_img, (state.grid.exit.x, state.grid.exit.y))
+    return surface
+
+def update_board(row, col):
+    """Redraw one cell of the cached board after it changed."""
+    draw_cell(state.background, row, col)
+    rect = (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    state.canvas.blit(state.background, rect, rect)
+
+def restore_session(session_state):
+    """Bring a fetched session up to date before its request runs."""
+    if session_state.grid is None:
+        setup_grid(session_state.current_problem, session_state.edits)
+    elif session_state.background is None:
+        session_state.background = render_board()
+        session_state.canvas = session_state.background.copy()
+
+# `state` is the current request's GameState, locked for the whole request
+state = install_sessions(
+    app, session_store, on_load=restore_session,
+    exempt={'get_stored_frame', 'cache_stats', 'list_problems', 'solve_batch', METRICS_ENDPOINT, 'static'}
+)
+
+def highlight_rect(step):
+    cell = state.grid.get_cell(*step) if step else None
+    return pygame.Rect(cell.x, cell.y, CELL_SIZE, CELL_SIZE) if cell else None
+
+def generate_frame(highlight=None):
+    # Frames are drawn on a working copy of the cached board; only the
+    # overlay is drawn here and then painted over again from the board.
+    surface = state.canvas
+    dirty = highlight_rect(highlight)
     
     # Highlight current path step
-    if highlight:
-        cell = state.grid.get_cell(*highlight)
-        if cell:
-            pygame.draw.rect(surface, BLUE, (cell.x, cell.y, CELL_SIZE, CELL_SIZE), 3)
+    if dirty:
+        pygame.draw.rect(surface, BLUE, dirty, 3)
     
-    # Convert to base64
-    buffer = BytesIO()
-    pygame.image.save(surface, buffer, format="PNG")
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    frame = encode_png(surface)
+    if dirty:
+        surface.blit(state.background, dirty, dirty)
+    return frame
+
+def frame_surfaces(path):
+    """Yield the canvas once per frame of the path animation.
+
+    The canvas is reused: each yielded state is only valid until the
+    generator is resumed.
+    """
+    surface = state.canvas
+    
+    # Initial state, one frame per path step, final state
+    yield surface
+    for step in path:
+        dirty = highlight_rect(step)
+        if dirty:
+            pygame.draw.rect(surface, BLUE, dirty, 3)
+        yield surface
+        if dirty:
+            surface.blit(state.background, dirty, dirty)
+    yield surface
+
+def generate_delta_frames(path):
+    """Same sequence as generate_frame over the path, as a keyframe plus patches.
+
+    Consecutive frames only differ in the previous and current highlight,
+    so each patch covers just those two cells.
+    """
+    surface = state.canvas
+    keyframe = encode_png(surface)
+    patches = []
+    previous = None
+    for step in list(path) + [None]:
+        current = highlight_rect(step)
+        if current:
+            pygame.draw.rect(surface, BLUE, current, 3)
+        dirty = [rect for rect in (previous, current) if rect]
+        patches.append(encode_patch(surface, dirty[0].unionall(dirty[1:])) if dirty else None)
+        if current:
+            surface.blit(state.background, current, current)
+        previous = current
+    return {'keyframe': keyframe, 'patches': patches}
+
+def agent_color(agent):
+    color = pygame.Color(0, 0, 0)
+    # Golden-angle hue steps keep neighbouring agent numbers apart
+    color.hsva = ((agent * 137.5) % 360, 80, 90, 100)
+    return color
+
+def agent_surfaces(paths):
+    """Yield the canvas once per time step with every agent still on the board.
+
+    Like frame_surfaces, the canvas is reused between frames.
+    """
+    surface = state.canvas
+    for t in range(max(map(len, paths), default=0)):
+        dirty = []
+        for agent, (row, col) in multiagent.positions_at(paths, t):
+            rect = pygame.Rect(col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+            pygame.draw.circle(surface, agent_color(agent), rect.center, CELL_SIZE // 3)
+            dirty.append(rect)
+        yield surface
+        for rect in dirty:
+            surface.blit(state.background, rect, rect)
+
+def board_frame():
+    """(hash, PNG) of the plain board frame, kept in frame_store and rendered only once."""
+    key = state.grid.fingerprint()
+    digest = board_frames.get(key)
+    data = frame_store.get(digest) if digest is not None else None
+    if data is None:
+        data = png_bytes(state.canvas)
+        digest = frame_store.put(data)
+        board_frames.put(key, digest)
+    return digest, data
+
+def board_frame_fields():
+    """The 'frame' fields of a response: base64, or a hash with ?frames=ref."""
+    digest, data = board_frame()
+    if request.args.get('frames') == 'ref':
+        return {'frameHash': digest, 'frameUrl': frame_url(digest)}
+    return {'frame': base64.b64encode(data).decode('utf-8')}
+
+def frame_fields(frames, mode):
+    """Animation fields of a response: base64 frames, or their hashes with mode 'ref'.
+
+    Frames too large to keep in frame_store until they are fetched are sent
+    inline, and the response's mode says 'full'.
+    """
+    digests = frame_store.put_all(frames) if mode == 'ref' else None
+    if digests is None:
+        return {'frames': frames, 'mode': 'full' if mode == 'ref' else mode}
+    return {'frameHashes': digests, 'frameUrls': [frame_url(digest) for digest in digests]}
 
 @app.route('/api/init')
 def initialize():
     setup_grid(state.current_problem)
     return jsonify({
-        'frame': generate_frame(),
+        **board_frame_fields(),
         'problem': state.current_problem,
-        'total_problems': len(create_problem(0))  # Update if you add more problems
+        'total_problems': len(catalog)
     })
 
 @app.route('/api/start')
 def start_simulation():
-    state.path = dijkstra(state.grid, create_problem(state.current_problem)['start'])
-    state.frames = []
+    algorithm = request.args.get('algorithm', 'dijkstra')
+    if algorithm not in search.STRATEGIES:
+        return jsonify({
+            'error': f'Unknown algorithm: {algorithm}',
+            'algorithms': sorted(search.STRATEGIES)
+        }), 400
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'delta', 'ref'):
+        return jsonify({'error': f'Unknown mode: {mode}', 'modes': ['full', 'delta', 'ref']}), 400
+    # ref responses reuse the base64 frames of full ones, stored on demand
+    key = (state.grid.fingerprint(), algorithm, 'delta' if mode == 'delta' else 'full')
+    cached = path_cache.get(key)
+    if cached is not None:
+        path, expanded, frames = cached
+        state.path = list(path)
+    else:
+        state.path, expanded = search.solve(
+            state.grid, (state.grid.start.row, state.grid.start.col), algorithm
+        )
+        if mode == 'delta':
+            frames = generate_delta_frames(state.path)
+        else:
+            frames = encode_frames(frame_surfaces(state.path))
+        path_cache.put(key, (tuple(state.path), expanded, frames))
     
-    # Generate initial state
-    state.frames.append(generate_frame())
+    response = {
+        'path_length': len(state.path) if state.path else 0,
+        'success': bool(state.path),
+        'algorithm': algorithm,
+        'expanded': expanded,
+        'cached': cached is not None,
+        'mode': mode
+    }
+    if mode == 'delta':
+        response.update(frames)
+    else:
+        response.update(frame_fields(frames, mode))
+    return jsonify(response)
+
+@app.route('/api/start/stream')
+def stream_simulation():
+    algorithm = request.args.get('algorithm', 'dijkstra')
+    if algorithm not in search.STRATEGIES:
+        return jsonify({
+            'error': f'Unknown algorithm: {algorithm}',
+            'algorithms': sorted(search.STRATEGIES)
+        }), 400
+    path, expanded = search.solve(
+        state.grid, (state.grid.start.row, state.grid.start.col), algorithm
+    )
+    state.path = path
     
-    # Generate animation frames
-    for step in state.path:
-        state.frames.append(generate_frame(step))
+    def events():
+        yield sse_event('meta', {
+            'path_length': len(path),
+            'success': bool(path),
+            'algorithm': algorithm,
+            'expanded': expanded
+        })
+        # Frames are encoded one at a time as the client consumes them
+        for surface in frame_surfaces(path):
+            yield sse_event('frame', {'frame': encode_png(surface)})
+        yield sse_event('done', {})
     
-    # Add final state
-    state.frames.append(generate_frame())
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/api/cache')
+def cache_stats():
+    return jsonify(path_cache.stats())
+
+@app.route('/api/distance-field')
+def get_distance_field():
+    # An optional ?row&col start also returns its path to the exit
+    start = None
+    if 'row' in request.args or 'col' in request.args:
+        start = (request.args.get('row', type=int), request.args.get('col', type=int))
+        if None in start:
+            return jsonify({'error': 'row and col must both be integers'}), 400
+        if state.grid.get_cell(*start) is None:
+            return jsonify({'error': f'Start {start} is outside the board'}), 400
+    if state.grid.field is None:
+        state.grid.field = search.distance_field(state.grid)
+    distance, next_hop = state.grid.field
+    response = {
+        'rows': state.grid.rows,
+        'cols': state.grid.cols,
+        'exit': [state.grid.exit.row, state.grid.exit.col],
+        'distance': distance.tolist(),
+        'next_hop': next_hop.tolist()
+    }
+    if start is not None:
+        response['path'] = search.field_path(state.grid, state.grid.field, start)
+    return jsonify(response)
+
+@app.route('/api/obstacle', methods=['POST'])
+def toggle_obstacle():
+    row = request.args.get('row', type=int)
+    col = request.args.get('col', type=int)
+    if row is None or col is None or state.grid.get_cell(row, col) is None:
+        return jsonify({'error': 'row and col must name a cell on the board'}), 400
+    if state.grid.get_cell(row, col) in (state.grid.start, state.grid.exit):
+        return jsonify({'error': 'The start and exit cannot be obstacles'}), 400
+    
+    if state.planner is None:
+        state.planner = LPAStar(state.grid, (state.grid.start.row, state.grid.start.col))
+        state.planner.compute_shortest_path()
+    expanded = state.planner.toggle(row, col)
+    state.edits ^= {state.grid.index(row, col)}
+    state.grid.field = None
+    update_board(row, col)
+    state.path = state.planner.path()
     
     return jsonify({
-        'frames': state.frames,
-        'path_length': len(state.path) if state.path else 0,
-        'success': bool(state.path)
+        'frame': generate_frame(),
+        'obstacle': bool(state.grid.obstacles[state.grid.index(row, col)]),
+        'path': state.path,
+        'path_length': len(state.path),
+        'success': bool(state.path),
+        'expanded': expanded
+    })
+
+MAX_AGENTS = 1000
+
+@app.route('/api/agents', methods=['GET', 'POST'])
+def plan_agents():
+    """Plan many players on the current board at once.
+
+    GET places ?count agents on random open cells (?seed); POST takes
+    {"starts": [[r, c], ...]}. ?mode=full returns base64 frames, ref frame
+    hashes, none only the paths.
+    """
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'ref', 'none'):
+        return jsonify({'error': f'Unknown mode: {mode}', 'modes': ['full', 'ref', 'none']}), 400
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        starts = body.get('starts', []) if isinstance(body, dict) else None
+        if not isinstance(starts, list):
+            return jsonify({'error': 'starts must be a list of [row, col]'}), 400
+        if len(starts) > MAX_AGENTS:
+            return jsonify({'error': f'At most {MAX_AGENTS} agents'}), 400
+        if not all(
+            isinstance(start, list) and len(start) == 2 and type(start[0]) is int and type(start[1]) is int
+            and state.grid.get_cell(*start) is not None
+            for start in starts
+        ):
+            return jsonify({'error': 'Every start must be a [row, col] on the board'}), 400
+        starts = [tuple(start) for start in starts]
+        if len(set(starts)) != len(starts):
+            return jsonify({'error': 'Agents must start on different cells'}), 400
+    else:
+        count = request.args.get('count', 10, type=int)
+        seed = request.args.get('seed', 0, type=int)
+        if not 0 <= count <= MAX_AGENTS:
+            return jsonify({'error': f'count must be 0 to {MAX_AGENTS}'}), 400
+        if seed < 0:
+            return jsonify({'error': 'seed must not be negative'}), 400
+        starts = multiagent.random_starts(state.grid, count, seed)
+    
+    if state.grid.field is None:
+        state.grid.field = search.distance_field(state.grid)
+    with span('solve'):
+        paths, expanded = multiagent.plan(state.grid, starts, state.grid.field)
+    response = {
+        'paths': paths,
+        'makespan': max(map(len, paths), default=0),
+        'planned': sum(1 for path in paths if path),
+        'agents': len(paths),
+        'expanded': expanded,
+        'mode': mode
+    }
+    if mode != 'none':
+        response.update(frame_fields(encode_frames(agent_surfaces(paths)), mode))
+    return jsonify(response)
+
+@app.route('/api/tiles')
+def tile_info():
+    max_zoom = tile_pyramid.max_zoom(state.grid)
+    return jsonify({
+        'tileSize': TILE_SIZE,
+        'rows': state.grid.rows,
+        'cols': state.grid.cols,
+        'maxZoom': max_zoom,
+        'levels': [
+            {'zoom': z, 'cellSize': tile_pyramid.scale(state.grid, z), 'tiles': tile_pyramid.tile_count(state.grid, z)}
+            for z in range(max_zoom + 1)
+        ]
+    })
+
+@app.route('/api/tiles/<int:z>/<int:x>/<int:y>.png')
+def get_tile(z, x, y):
+    if not tile_pyramid.contains(state.grid, z, x, y):
+        abort(404)
+    response = Response(tile_pyramid.tile(state.grid, z, x, y), mimetype='image/png')
+    # Tiles change when the board does; revalidate against the board fingerprint
+    response.set_etag(f'{state.grid.fingerprint()}-{z}-{x}-{y}')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/scene')
+def get_scene():
+    algorithm = request.args.get('algorithm', 'dijkstra')
+    if algorithm not in search.STRATEGIES:
+        return jsonify({
+            'error': f'Unknown algorithm: {algorithm}',
+            'algorithms': sorted(search.STRATEGIES)
+        }), 400
+    path, expanded = search.solve(
+        state.grid, (state.grid.start.row, state.grid.start.col), algorithm
+    )
+    grid = state.grid
+    return jsonify({
+        'type': 'grid',
+        'width': WIDTH,
+        'height': HEIGHT,
+        'cellSize': CELL_SIZE,
+        'rows': grid.rows,
+        'cols': grid.cols,
+        'start': [grid.start.row, grid.start.col],
+        'exit': [grid.exit.row, grid.exit.col],
+        'obstacles': grid.obstacle_positions(),
+        'path': path,
+        'expanded': expanded,
+        'problem': state.current_problem
+    })
+
+MAX_BATCH_QUERIES = 100000
+# Inline boards are allocated from the request body, so their size is
+# capped, as is the total of all boards one batch builds
+MAX_BOARD_CELLS = 1 << 22
+MAX_BATCH_CELLS = 1 << 24
+
+def batch_grid(spec):
+    """Grid for a /api/solve/batch board: {'problem': n} or an inline board."""
+    if 'problem' in spec:
+        problem = catalog[int(spec['problem'])]
+        grid = Grid(problem.rows, problem.cols, CELL_SIZE)
+        grid.obstacles[:] = problem.obstacles
+        grid.exit = grid.get_cell(*problem.exit)
+        return grid
+    rows = int(spec.get('rows', spec.get('n', 0)))
+    cols = int(spec.get('cols', spec.get('n', 0)))
+    if rows <= 0 or cols <= 0:
+        raise ValueError('A board needs positive rows and cols')
+    if rows * cols > MAX_BOARD_CELLS:
+        raise ValueError(f'A board has at most {MAX_BOARD_CELLS} cells')
+    grid = Grid(rows, cols, CELL_SIZE)
+    for row, col in spec.get('obstacles', ()):
+        if grid.get_cell(row, col) is None:
+            raise ValueError(f'Obstacle {(row, col)} is outside the board')
+        grid.obstacles[grid.index(row, col)] = True
+    if 'exit' in spec:
+        grid.exit = grid.get_cell(*spec['exit'])
+    return grid
+
+def batch_position(grid, value, name):
+    if value is None:
+        cell = grid.exit if name == 'exit' else None
+    else:
+        row, col = value
+        cell = grid.get_cell(int(row), int(col))
+    if cell is None:
+        raise ValueError(f'{name} {value} is missing or outside the board')
+    return (cell.row, cell.col)
+
+@app.route('/api/solve/batch', methods=['POST'])
+def solve_batch():
+    """Solve many (board, start, exit) queries in one request, without rendering.
+
+    Body: {"boards": [{"problem": n} | {"rows", "cols", "obstacles", "exit"?}],
+           "queries": [{"board": i | "problem": n, "start": [r, c], "exit"?: [r, c]}],
+           "paths": true}
+    """
+    body = request.get_json(silent=True) or {}
+    specs = body.get('boards', [])
+    queries = body.get('queries', [])
+    if not isinstance(specs, list) or not isinstance(queries, list):
+        return jsonify({'error': 'boards and queries must be lists'}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+    
+    began = time.perf_counter()
+    # Boards are numbered as given, then catalog problems referenced directly
+    keys = {('board', i): spec for i, spec in enumerate(specs)}
+    grids = {}
+    parsed = []
+    cells = 0
+    try:
+        for number, query in enumerate(queries):
+            key = ('problem', query['problem']) if 'problem' in query else ('board', query.get('board', 0))
+            if key not in grids:
+                if key[0] == 'board' and key not in keys:
+                    raise ValueError(f'Query {number} names unknown board {key[1]}')
+                grids[key] = batch_grid(keys.get(key, {'problem': key[1]}))
+                cells += grids[key].size
+                if cells > MAX_BATCH_CELLS:
+                    raise ValueError(f'The boards of one batch have at most {MAX_BATCH_CELLS} cells')
+            grid = grids[key]
+            parsed.append((
+                key,
+                batch_position(grid, query.get('start'), 'start'),
+                batch_position(grid, query.get('exit'), 'exit')
+            ))
+    except (ValueError, TypeError, KeyError, IndexError) as error:
+        return jsonify({'error': f'Invalid batch: {error}'}), 400
+    
+    paths = bool(body.get('paths', True))
+    with span('solve'):
+        results = search.solve_queries(grids, parsed, paths=paths)
+    elapsed = time.perf_counter() - began
+    return jsonify({
+        'results': [
+            {'length': length, 'success': length >= 0, **({'path': path} if paths else {})}
+            for length, path in results
+        ],
+        'queries': len(parsed),
+        'boards': len(grids),
+        'elapsed': elapsed,
+        'queries_per_second': len(parsed) / elapsed if elapsed else None
+    })
+
+@app.route('/api/problems')
+def list_problems():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 0), 1000)
+    return jsonify({
+        'problems': [catalog.info(i) for i in range(offset, min(offset + limit, len(catalog)))],
+        'offset': offset,
+        'total': len(catalog)
     })
 
 @app.route('/api/next')
 def next_problem():
-    if state.current_problem < 2:
+    if state.current_problem < len(catalog) - 1:
         state.current_problem += 1
         setup_grid(state.current_problem)
     return jsonify({
-        'frame': generate_frame(),
+        **board_frame_fields(),
         'problem': state.current_problem
     })
 
@@ -1,7 +1,11 @@
+import argparse
 import pygame
 import sys
-import heapq
-from time import sleep
+import time
+from collections import deque
+from grid_engine import Grid
+import grading
+import search
 
 # Initialize Pygame
 pygame.init()
@@ -19,6 +23,10 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 GRAY = (200, 200, 200)
 
+# Playback timeline: one path step every STEP_MS; frame cap while animating
+STEP_MS = 500
+FPS = 60
+
 # Load images
 player_img = pygame.image.load('player.png')  # Replace with actual image path
 obstacle_img = pygame.image.load('obstacle.png')  # Replace with actual image path
@@ -29,40 +37,6 @@ player_img = pygame.transform.scale(player_img, (CELL_SIZE, CELL_SIZE))
 obstacle_img = pygame.transform.scale(obstacle_img, (CELL_SIZE, CELL_SIZE))
 exit_img = pygame.transform.scale(exit_img, (CELL_SIZE, CELL_SIZE))
 
-class Cell:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.x = col * CELL_SIZE
-        self.y = row * CELL_SIZE
-        self.is_obstacle = False
-        self.neighbors = []
-        self.previous = None
-        self.distance = float('inf')
-
-    def draw(self, screen):
-        if self.is_obstacle:
-            screen.blit(obstacle_img, (self.x, self.y))
-
-class Grid:
-    def __init__(self, rows, cols):
-        self.rows = rows
-        self.cols = cols
-        self.grid = [[Cell(row, col) for col in range(cols)] for row in range(rows)]
-        self.start = None
-        self.exit = None
-
-    def get_cell(self, row, col):
-        if 0 <= row < self.rows and 0 <= col < self.cols:
-            return self.grid[row][col]
-        return None
-
-    def reset(self):
-        for row in self.grid:
-            for cell in row:
-                cell.distance = float('inf')
-                cell.previous = None
-
 def create_problem(problem_num):
     problems = [
         {
@@ -87,43 +61,50 @@ def create_problem(problem_num):
     return problems[problem_num]
 
 def dijkstra(grid, start, result=True):
-    grid.reset()
-    start_cell = grid.get_cell(*start)
-    start_cell.distance = 0
-    queue = [(0, start_cell.row, start_cell.col)]
-    
-    while queue:
-        current_dist, row, col = heapq.heappop(queue)
-        current_cell = grid.get_cell(row, col)
-        
-        if current_cell == grid.exit:
-            break
-            
-        for neighbor in current_cell.neighbors:
-            if neighbor.is_obstacle:
-                continue
-            new_dist = current_dist + 1
-            if new_dist < neighbor.distance:
-                neighbor.distance = new_dist
-                neighbor.previous = current_cell
-                heapq.heappush(queue, (new_dist, neighbor.row, neighbor.col))
-    
-    path = []
-    current = grid.exit
-    while current:
-        path.insert(0, (current.row, current.col))
-        current = current.previous
-    return path if grid.exit.distance != float('inf') else []
+    path, _ = search.dijkstra(grid, start)
+    return path
+
+def validate_submissions(source, dest, catalog_path=None, workers=grading.WORKERS):
+    """Headless grading of submitted paths against this game's problems (or a catalog)."""
+    problems = None if catalog_path else [create_problem(i) for i in range(3)]
+    return grading.grade_file(source, dest, catalog_path, problems, workers)
+
+def draw_board(screen, grid):
+    for row, col in grid.obstacle_positions():
+        screen.blit(obstacle_img, (col * CELL_SIZE, row * CELL_SIZE))
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            pygame.draw.rect(screen, BLACK, (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE), 1)
+
+def render_background(grid, buttons):
+    """Everything that does not move: board, exit and the labelled buttons."""
+    background = pygame.Surface((WIDTH, HEIGHT))
+    background.fill(WHITE)
+    draw_board(background, grid)
+    background.blit(exit_img, (grid.exit.x, grid.exit.y))
+    for rect, label in buttons:
+        pygame.draw.rect(background, GRAY, rect)
+        background.blit(label, (rect.x+25, rect.y+10))
+    return background
 
 def main(result=True):
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Dijkstra's Pathfinding")
+    clock = pygame.time.Clock()
+    
+    # Fonts and text are rendered once, not every frame
+    button_font = pygame.font.SysFont(None, 30)
+    start_text = button_font.render('Start', True, BLACK)
+    next_text = button_font.render('Next', True, BLACK)
+    game_over_text = pygame.font.SysFont(None, 60).render('GAME OVER', True, RED)
     
     current_problem = 0
     problems = [create_problem(i) for i in range(3)]
     grid = None
-    path = []
-    running = True
+    background = None
+    player_rect = None
+    steps = deque()
+    next_step_at = 0
     game_over = False
     
     start_button = pygame.Rect(
@@ -139,112 +120,97 @@ def main(result=True):
         BUTTON_HEIGHT
     )
     
+    def move_player(cell):
+        """Restore the player's old cell from the background, draw it at cell; returns the dirty rects."""
+        nonlocal player_rect
+        dirty = []
+        if player_rect is not None:
+            screen.blit(background, player_rect, player_rect)
+            dirty.append(player_rect)
+        player_rect = screen.blit(player_img, (cell.x, cell.y))
+        dirty.append(player_rect)
+        return dirty
+    
     def setup_grid(problem):
-        nonlocal grid
+        nonlocal grid, background, player_rect
         config = problems[problem]
         n = config['n']
-        grid = Grid(n, n)
+        grid = Grid(n, n, CELL_SIZE)
         
         # Set start and exit
         grid.start = grid.get_cell(*config['start'])
         grid.exit = grid.get_cell(*config['exit'])
         
-        # Set obstacles
+        # Set obstacles; neighbors are derived from cell indices on demand
         for obstacle in config['obstacles']:
-            grid.get_cell(*obstacle).is_obstacle = True
-            
-        # Create neighbors
-        for row in grid.grid:
-            for cell in row:
-                cell.neighbors = []
-                if cell.row > 0:
-                    neighbor = grid.get_cell(cell.row-1, cell.col)
-                    if neighbor:
-                        cell.neighbors.append(neighbor)
-                if cell.row < grid.rows-1:
-                    neighbor = grid.get_cell(cell.row+1, cell.col)
-                    if neighbor:
-                        cell.neighbors.append(neighbor)
-                if cell.col > 0:
-                    neighbor = grid.get_cell(cell.row, cell.col-1)
-                    if neighbor:
-                        cell.neighbors.append(neighbor)
-                if cell.col < grid.cols-1:
-                    neighbor = grid.get_cell(cell.row, cell.col+1)
-                    if neighbor:
-                        cell.neighbors.append(neighbor)
+            grid.obstacles[grid.index(*obstacle)] = True
+        
+        # A new board is the only full repaint
+        background = render_background(grid, [(start_button, start_text), (next_button, next_text)])
+        screen.blit(background, (0, 0))
+        player_rect = None
+        move_player(grid.start)
+        pygame.display.flip()
     
     setup_grid(current_problem)
     
-    while running:
-        screen.fill(WHITE)
-        
-        # Draw grid
-        for row in grid.grid:
-            for cell in row:
-                cell.draw(screen)
-                pygame.draw.rect(screen, BLACK, (cell.x, cell.y, CELL_SIZE, CELL_SIZE), 1)
-        
-        # Draw start and exit
-        screen.blit(player_img, (grid.start.x, grid.start.y))
-        screen.blit(exit_img, (grid.exit.x, grid.exit.y))
-        
-        # Draw buttons
-        pygame.draw.rect(screen, GRAY, start_button)
-        start_text = pygame.font.SysFont(None, 30).render('Start', True, BLACK)
-        screen.blit(start_text, (start_button.x+25, start_button.y+10))
+    while True:
+        if steps:
+            clock.tick(FPS)
+            events = pygame.event.get()
+        else:
+            # Nothing is animating: sleep until the next event
+            events = [pygame.event.wait()] + pygame.event.get()
         
+        dirty = []
         next_disabled = current_problem >= len(problems)-1
-        btn_color = GRAY if next_disabled else GRAY
-        pygame.draw.rect(screen, btn_color, next_button)
-        next_text = pygame.font.SysFont(None, 30).render('Next', True, BLACK)
-        screen.blit(next_text, (next_button.x+25, next_button.y+10))
-        
-        if game_over:
-            game_over_text = pygame.font.SysFont(None, 60).render('GAME OVER', True, RED)
-            screen.blit(game_over_text, (WIDTH//2-120, HEIGHT//2-30))
-        
-        pygame.display.flip()
-        
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                running = False
                 pygame.quit()
                 sys.exit()
             
             if event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
-                if start_button.collidepoint(x, y) and not game_over:
+                if start_button.collidepoint(x, y) and not game_over and not steps:
                     path = dijkstra(grid, problems[current_problem]['start'], result)
                     if not result and path:
                         path.append((path[-1][0]+1, path[-1][1]+1))  # Force invalid path
-                    
-                    # Animate movement
-                    current_pos = grid.start
-                    for step in path:
-                        next_cell = grid.get_cell(*step)
-                        if next_cell is None or next_cell.is_obstacle:
-                            game_over = True
-                            break
-                        
-                        # Update display
-                        screen.fill(WHITE)
-                        for r in grid.grid:
-                            for cell in r:
-                                cell.draw(screen)
-                                pygame.draw.rect(screen, BLACK, (cell.x, cell.y, CELL_SIZE, CELL_SIZE), 1)
-                        
-                        screen.blit(exit_img, (grid.exit.x, grid.exit.y))
-                        screen.blit(player_img, (next_cell.x, next_cell.y))
-                        pygame.display.flip()
-                        sleep(0.5)
-                        current_pos = next_cell
+                    steps = deque(path)
+                    next_step_at = pygame.time.get_ticks()
                 
                 elif next_button.collidepoint(x, y) and not next_disabled and not game_over:
+                    # Also cancels a running animation
+                    steps.clear()
                     current_problem += 1
                     setup_grid(current_problem)
-                    game_over = False
+        
+        # Animate movement along the timeline
+        if steps and pygame.time.get_ticks() >= next_step_at:
+            next_cell = grid.get_cell(*steps.popleft())
+            if next_cell is None or next_cell.is_obstacle:
+                game_over = True
+                steps.clear()
+                dirty.append(screen.blit(game_over_text, (WIDTH//2-120, HEIGHT//2-30)))
+            else:
+                dirty += move_player(next_cell)
+                next_step_at += STEP_MS
+        
+        if dirty:
+            pygame.display.update(dirty)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dijkstra's Pathfinding")
+    parser.add_argument('--validate', metavar='SUBMISSIONS', help='grade a JSON lines file of paths without opening a window')
+    parser.add_argument('-o', '--output', default='results.jsonl')
+    parser.add_argument('--catalog', help='problem catalog file, instead of the built-in problems')
+    parser.add_argument('--workers', type=int, default=grading.WORKERS)
+    args = parser.parse_args()
+    if args.validate:
+        began = time.perf_counter()
+        count = validate_submissions(args.validate, args.output, args.catalog, args.workers)
+        elapsed = time.perf_counter() - began
+        print(f'Graded {count} submissions in {elapsed:.2f}s ({count / elapsed:.0f}/s) to {args.output}')
+        sys.exit()
+    
     result_param = True  # Set this to False for game over scenario
     main(result_param)
\ No newline at end of file
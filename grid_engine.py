@@ -0,0 +1,194 @@
+import hashlib
+import math
+
+import numpy as np
+
+INF = float('inf')
+SQRT2 = math.sqrt(2)
+
+# Row/column offsets of the 4-connected moves: up, down, left, right
+OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# Extra offsets allowed on diagonal grids
+DIAGONAL_OFFSETS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+class Cell:
+    """Lightweight view of one grid position.
+
+    All state lives in the arrays owned by the Grid, so creating a Cell is
+    cheap and nothing is stored per cell on the board itself.
+    """
+    __slots__ = ('grid', 'row', 'col')
+
+    def __init__(self, grid, row, col):
+        self.grid = grid
+        self.row = row
+        self.col = col
+
+    @property
+    def index(self):
+        return self.row * self.grid.cols + self.col
+
+    @property
+    def x(self):
+        return self.col * self.grid.cell_size
+
+    @property
+    def y(self):
+        return self.row * self.grid.cell_size
+
+    @property
+    def is_obstacle(self):
+        return bool(self.grid.obstacles[self.index])
+
+    @is_obstacle.setter
+    def is_obstacle(self, value):
+        self.grid.obstacles[self.index] = value
+
+    @property
+    def distance(self):
+        return float(self.grid.distance[self.index])
+
+    @property
+    def previous(self):
+        return self.grid.cell_at(int(self.grid.previous[self.index]))
+
+    @property
+    def neighbors(self):
+        return [self.grid.cell_at(i) for i in self.grid.neighbors(self.index)]
+
+    def __eq__(self, other):
+        return (isinstance(other, Cell) and self.grid is other.grid
+                and self.row == other.row and self.col == other.col)
+
+    def __hash__(self):
+        return hash((id(self.grid), self.row, self.col))
+
+    def __repr__(self):
+        return f'Cell({self.row}, {self.col})'
+
+
+class Grid:
+    """Array-backed grid.
+
+    Occupancy, search distance and predecessor are stored in flat NumPy
+    arrays indexed by ``row * cols + col``; neighbors are derived from the
+    index instead of being stored.
+
+    Boards are unit-cost and 4-connected unless terrain costs are set with
+    set_costs or the grid is built with ``diagonal=True``; see moves().
+    """
+
+    def __init__(self, rows, cols, cell_size=40, diagonal=False):
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.obstacles = np.zeros(rows * cols, dtype=np.bool_)
+        self.distance = np.full(rows * cols, INF)
+        self.previous = np.full(rows * cols, -1, dtype=np.int64)
+        self.start = None
+        self.exit = None
+        # (distance, next_hop) arrays towards the exit, see search.distance_field
+        self.field = None
+        # Cost of entering each cell (float32), None when every cell costs 1
+        self.cost = None
+        self.diagonal = diagonal
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    @property
+    def uniform(self):
+        """True for unit-cost 4-connected boards, the only kind BFS-based searches handle."""
+        return self.cost is None and not self.diagonal
+
+    def set_costs(self, cost):
+        """Set per-cell entry costs from any array of rows x cols positive values."""
+        cost = np.asarray(cost, dtype=np.float32).reshape(-1)
+        if cost.size != self.size:
+            raise ValueError(f'Cost array has {cost.size} cells, expected {self.rows}x{self.cols}')
+        if not np.all(np.isfinite(cost) & (cost > 0)):
+            raise ValueError('Costs must be positive and finite; use obstacles for walls')
+        self.cost = cost
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def position(self, index):
+        return divmod(index, self.cols)
+
+    def get_cell(self, row, col):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return Cell(self, row, col)
+        return None
+
+    def cell_at(self, index):
+        if index < 0:
+            return None
+        return Cell(self, *divmod(index, self.cols))
+
+    def neighbors(self, index):
+        """Indices of the in-bounds 4-connected neighbors of ``index``."""
+        row, col = divmod(index, self.cols)
+        result = []
+        if row > 0:
+            result.append(index - self.cols)
+        if row < self.rows - 1:
+            result.append(index + self.cols)
+        if col > 0:
+            result.append(index - 1)
+        if col < self.cols - 1:
+            result.append(index + 1)
+        return result
+
+    def moves(self, index):
+        """(neighbor, step cost) pairs for every open cell reachable from ``index``.
+
+        A step costs the entry cost of the cell it lands on, times sqrt(2)
+        when diagonal. Diagonal steps may not cut the corner of an obstacle.
+        """
+        obstacles = self.obstacles
+        cost = self.cost
+        result = []
+        for neighbor in self.neighbors(index):
+            if not obstacles[neighbor]:
+                result.append((neighbor, 1.0 if cost is None else float(cost[neighbor])))
+        if not self.diagonal:
+            return result
+
+        cols = self.cols
+        row, col = divmod(index, cols)
+        for d_row, d_col in DIAGONAL_OFFSETS:
+            r, c = row + d_row, col + d_col
+            if not (0 <= r < self.rows and 0 <= c < cols):
+                continue
+            neighbor = r * cols + c
+            if obstacles[neighbor] or obstacles[row * cols + c] or obstacles[r * cols + col]:
+                continue
+            result.append((neighbor, SQRT2 * (1.0 if cost is None else float(cost[neighbor]))))
+        return result
+
+    def obstacle_positions(self):
+        return [self.position(int(i)) for i in np.flatnonzero(self.obstacles)]
+
+    def fingerprint(self):
+        """Hash of everything that determines a solution: size, obstacles, start and exit.
+
+        Costs and diagonal moves are only hashed when set, so uniform boards
+        keep the same fingerprint.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{self.rows}x{self.cols}'.encode())
+        for cell in (self.start, self.exit):
+            digest.update(repr((cell.row, cell.col) if cell else None).encode())
+        digest.update(np.packbits(self.obstacles).tobytes())
+        if self.diagonal:
+            digest.update(b'diagonal')
+        if self.cost is not None:
+            digest.update(self.cost.tobytes())
+        return digest.hexdigest()
+
+    def reset(self):
+        self.distance.fill(INF)
+        self.previous.fill(-1)
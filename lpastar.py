@@ -0,0 +1,110 @@
+import heapq
+
+from grid_engine import INF
+
+
+class LPAStar:
+    """Lifelong Planning A* between a fixed start and grid.exit.
+
+    The planner keeps its g/rhs values and open list between calls, so after
+    an obstacle is toggled only the cells whose distance actually changed
+    are re-expanded. Values are kept in dicts, so memory grows with the
+    cells the search has touched rather than with the board.
+    """
+
+    def __init__(self, grid, start):
+        if not grid.uniform:
+            raise ValueError('LPAStar needs a unit-cost 4-connected grid')
+        self.grid = grid
+        self.start = grid.index(*start)
+        self.goal = grid.exit.index
+        self.g = {}
+        self.rhs = {self.start: 0}
+        self.open = {}
+        self.queue = []
+        self.expanded = 0
+        self._push(self.start)
+
+    def _heuristic(self, index):
+        row, col = divmod(index, self.grid.cols)
+        goal_row, goal_col = divmod(self.goal, self.grid.cols)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+    def _key(self, index):
+        value = min(self.g.get(index, INF), self.rhs.get(index, INF))
+        return (value + self._heuristic(index), value)
+
+    def _push(self, index):
+        key = self._key(index)
+        self.open[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def _top_key(self):
+        # Drop entries that were superseded or removed since they were pushed
+        while self.queue:
+            key, index = self.queue[0]
+            if self.open.get(index) == key:
+                return key
+            heapq.heappop(self.queue)
+        return (INF, INF)
+
+    def _update_vertex(self, index):
+        grid = self.grid
+        if index != self.start:
+            best = INF
+            if not grid.obstacles[index]:
+                for neighbor in grid.neighbors(index):
+                    if not grid.obstacles[neighbor]:
+                        best = min(best, self.g.get(neighbor, INF) + 1)
+            self.rhs[index] = best
+        self.open.pop(index, None)
+        if self.g.get(index, INF) != self.rhs.get(index, INF):
+            self._push(index)
+
+    def compute_shortest_path(self):
+        """Expand inconsistent cells until the goal is consistent again.
+
+        Returns the number of cells expanded by this call.
+        """
+        expanded = 0
+        goal = self.goal
+        while (self._top_key() < self._key(goal)
+               or self.rhs.get(goal, INF) != self.g.get(goal, INF)):
+            if not self.queue:
+                break
+            _, index = heapq.heappop(self.queue)
+            del self.open[index]
+            expanded += 1
+            if self.g.get(index, INF) > self.rhs.get(index, INF):
+                self.g[index] = self.rhs[index]
+            else:
+                self.g[index] = INF
+                self._update_vertex(index)
+            for neighbor in self.grid.neighbors(index):
+                self._update_vertex(neighbor)
+        self.expanded += expanded
+        return expanded
+
+    def toggle(self, row, col):
+        """Flip the obstacle at (row, col) and repair the search state."""
+        index = self.grid.index(row, col)
+        self.grid.obstacles[index] = not self.grid.obstacles[index]
+        self._update_vertex(index)
+        for neighbor in self.grid.neighbors(index):
+            self._update_vertex(neighbor)
+        return self.compute_shortest_path()
+
+    def path(self):
+        self.compute_shortest_path()
+        if self.g.get(self.goal, INF) == INF:
+            return []
+        path = [self.grid.position(self.goal)]
+        index = self.goal
+        while index != self.start:
+            index = min(
+                (n for n in self.grid.neighbors(index) if not self.grid.obstacles[n]),
+                key=lambda n: self.g.get(n, INF)
+            )
+            path.append(self.grid.position(index))
+        path.reverse()
+        return path
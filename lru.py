@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry.
+
+    Keeps hit/miss/eviction counters so callers can report cache efficiency.
+    Safe to share between the threads of a threaded server. With max_bytes,
+    values are also weighed with len() and evicted to keep their total
+    within it.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _weigh(self, value):
+        return len(value) if self.max_bytes is not None else 0
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._weigh(self._data[key])
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self.bytes += self._weigh(value)
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= self._weigh(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            **({'bytes': self.bytes, 'max_bytes': self.max_bytes} if self.max_bytes is not None else {}),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
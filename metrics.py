@@ -0,0 +1,176 @@
+"""Per-stage latency metrics shared by the Flask apps.
+
+Code times a stage with ``with span('solve'):`` (or @timed('solve')), from
+the dependency-free timing module; once install() has run, the sample is
+recorded under the current request's endpoint. install() adds a
+whole-request 'request' stage, times JSON serialisation as 'serialise',
+and serves everything on /api/metrics in Prometheus text format:
+
+    request_stage_seconds            histogram over fixed buckets
+    request_stage_recent_seconds     summary, p50/p95/p99 of the last
+                                     WINDOW samples of each series
+
+Stages used across the apps: solve, layout, render, encode (PNG), serialise
+(base64 and JSON) and request.
+
+Setting PROFILE_DIR enables per-request profiling: a request sent with the
+header ``X-Profile: 1`` runs under cProfile and its stats are dumped to
+PROFILE_DIR, named in the X-Profile-Dump response header.
+"""
+import cProfile
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+import timing
+# Re-exported for the apps; library modules import them from timing
+from timing import span, timed
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 1024
+
+PROFILE_HEADER = 'X-Profile'
+METRICS_ENDPOINT = 'get_metrics'
+
+
+class Series:
+    """Histogram buckets, sum and count, plus a window of recent samples."""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=WINDOW)
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (app, endpoint, stage) -> Series
+        self._series = {}
+
+    def observe(self, app, endpoint, stage, seconds):
+        key = (app, endpoint, stage)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series()
+            series.observe(seconds)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """The registry in Prometheus text exposition format."""
+        lines = [
+            '# HELP request_stage_seconds Time spent in each stage of a request.',
+            '# TYPE request_stage_seconds histogram',
+        ]
+        recent = [
+            '# HELP request_stage_recent_seconds Quantiles over the most recent samples.',
+            '# TYPE request_stage_recent_seconds summary',
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+            snapshot = [(key, list(s.buckets), s.count, s.sum, list(s.recent)) for key, s in items]
+        for (app, endpoint, stage), buckets, count, total, samples in snapshot:
+            labels = f'app="{app}",endpoint="{endpoint}",stage="{stage}"'
+            for bound, value in zip(BUCKETS, buckets):
+                lines.append(f'request_stage_seconds_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'request_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'request_stage_seconds_sum{{{labels}}} {total}')
+            lines.append(f'request_stage_seconds_count{{{labels}}} {count}')
+            for quantile, value in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                recent.append(f'request_stage_recent_seconds{{{labels},quantile="{quantile}"}} {value}')
+            recent.append(f'request_stage_recent_seconds_sum{{{labels}}} {sum(samples)}')
+            recent.append(f'request_stage_recent_seconds_count{{{labels}}} {len(samples)}')
+        return '\n'.join(lines + recent) + '\n'
+
+
+registry = Registry()
+# Label for samples taken outside a request: the first app installed
+_default_app = ['']
+
+
+def _labels():
+    if has_request_context():
+        return g.get('metrics_app', _default_app[0]), request.endpoint or 'unknown'
+    return _default_app[0], 'none'
+
+
+def observe(stage, seconds):
+    app, endpoint = _labels()
+    registry.observe(app, endpoint, stage, seconds)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with dumps() timed as the 'serialise' stage."""
+
+    def dumps(self, obj, **kwargs):
+        with span('serialise'):
+            return super().dumps(obj, **kwargs)
+
+
+# cProfile cannot profile two threads of one process at once
+_profile_lock = threading.Lock()
+
+
+def install(app, name):
+    """Time every request of ``app`` and serve /api/metrics on it."""
+    _default_app[0] = _default_app[0] or name
+    timing.set_observer(observe)
+    app.json = TimedJSONProvider(app)
+    profile_dir = os.environ.get('PROFILE_DIR')
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_app = name
+        g.metrics_began = time.perf_counter()
+        if profile_dir and request.headers.get(PROFILE_HEADER) == '1' and _profile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def record_request(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+            filename = f'{request.endpoint}-{int(time.time())}-{uuid.uuid4().hex[:8]}.prof'
+            profiler.dump_stats(os.path.join(profile_dir, filename))
+            response.headers['X-Profile-Dump'] = filename
+        began = g.pop('metrics_began', None)
+        if began is not None and request.endpoint != METRICS_ENDPOINT:
+            observe('request', time.perf_counter() - began)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        # A request that failed before after_request still frees the profiler
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+
+    @app.route('/api/metrics', endpoint=METRICS_ENDPOINT)
+    def get_metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return get_metrics
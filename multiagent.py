@@ -0,0 +1,142 @@
+import heapq
+
+import numpy as np
+
+import search
+
+
+class Reservations:
+    """Space-time reservation table for prioritized planning.
+
+    A cell is reserved per time step, and every move is also reserved as an
+    edge so that a later agent cannot swap places with an earlier one.
+    """
+
+    def __init__(self, exit_index, horizon):
+        self.cells = set()
+        self.edges = set()
+        self.exit_index = exit_index
+        # next_arrival[t]: earliest time >= t at which the exit is free
+        self.next_arrival = list(range(horizon + 2))
+
+    def reserve(self, indices):
+        for t, index in enumerate(indices):
+            self.cells.add((index, t))
+            if t:
+                self.edges.add((indices[t - 1], index, t))
+        arrival = len(indices) - 1
+        if indices[-1] == self.exit_index and arrival < len(self.next_arrival) - 1:
+            following = self.next_arrival[arrival + 1]
+            for t in range(arrival, -1, -1):
+                if self.next_arrival[t] != arrival:
+                    break
+                self.next_arrival[t] = following
+
+    def free(self, index, t):
+        return (index, t) not in self.cells
+
+
+def _plan_one(grid, start, distance, reservations, horizon, moves):
+    """Space-time A* from start to grid.exit avoiding reservations.
+
+    Agents may wait in place. The heuristic is the exact distance to the
+    exit on the empty board, pushed back to the next time the exit is free:
+    with one agent leaving per step, late agents would otherwise search
+    every way of waiting before their turn. Returns (indices per time
+    step, expanded), or (None, expanded) if no conflict-free path arrives
+    before ``horizon``.
+    """
+    exit_index = grid.exit.index
+    next_arrival = reservations.next_arrival
+    cells, edges = reservations.cells, reservations.edges
+    if distance[start] < 0 or not reservations.free(start, 0):
+        return None, 0
+    parents = {(start, 0): None}
+    queue = [(next_arrival[distance[start]], 0, start)]
+    expanded = 0
+
+    while queue:
+        _, neg_t, index = heapq.heappop(queue)
+        t = -neg_t
+        if index == exit_index:
+            indices = []
+            state = (index, t)
+            while state is not None:
+                indices.append(state[0])
+                state = parents[state]
+            indices.reverse()
+            return indices, expanded
+        if t >= horizon:
+            continue
+        expanded += 1
+
+        targets = moves.get(index)
+        if targets is None:
+            # Open neighbors plus waiting in place, worked out once per cell
+            targets = moves[index] = [n for n, _ in grid.moves(index) if distance[n] >= 0] + [index]
+        for neighbor in targets:
+            state = (neighbor, t + 1)
+            if state in parents or state in cells or t + 1 + distance[neighbor] > horizon:
+                continue
+            if (neighbor, index, t + 1) in edges:
+                continue
+            parents[state] = (index, t)
+            # Ties on f go to the later time step, i.e. deeper nodes first
+            f = next_arrival[t + 1 + distance[neighbor]]
+            heapq.heappush(queue, (f, -(t + 1), neighbor))
+    return None, expanded
+
+
+def plan(grid, starts, field=None, horizon=None):
+    """Prioritized multi-agent planning towards grid.exit.
+
+    Agents are planned one at a time, nearest to the exit first, each
+    avoiding the space-time cells and moves reserved by those before it.
+    Every agent starts at t=0 and leaves the board on reaching the exit, so
+    several agents can use the exit at different time steps. The distance
+    field towards the exit is computed once (or taken from ``field``) and
+    shared as the heuristic of every agent.
+
+    Returns (paths, expanded): per agent, its (row, col) at t = 0, 1, ...
+    up to its arrival, or [] if it could not be planned.
+    """
+    if not grid.uniform:
+        raise ValueError('Multi-agent planning needs a unit-cost 4-connected grid')
+    if field is None:
+        field = grid.field if grid.field is not None else search.distance_field(grid)
+    distance = field[0].tolist()
+    indices = [grid.index(*start) for start in starts]
+    if horizon is None:
+        horizon = 2 * max(distance) + len(indices) + 1
+
+    reservations = Reservations(grid.exit.index, horizon)
+    # Agents that have not moved yet still hold their start cell at t=0
+    reservations.cells.update((index, 0) for index in indices)
+    order = sorted(range(len(indices)), key=lambda agent: distance[indices[agent]])
+    paths = [[] for _ in indices]
+    moves = {}
+    expanded = 0
+    for agent in order:
+        reservations.cells.discard((indices[agent], 0))
+        steps, count = _plan_one(grid, indices[agent], distance, reservations, horizon, moves)
+        expanded += count
+        if steps is None:
+            continue
+        reservations.reserve(steps)
+        paths[agent] = [grid.position(index) for index in steps]
+    return paths, expanded
+
+
+def random_starts(grid, count, seed=0):
+    """Distinct open cells (not the exit) that can reach the exit, chosen with ``seed``."""
+    if grid.field is None:
+        grid.field = search.distance_field(grid)
+    candidates = np.flatnonzero(grid.field[0] > 0)
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(candidates, size=min(count, candidates.size), replace=False)
+    return [grid.position(int(index)) for index in chosen]
+
+
+def positions_at(paths, t):
+    """(agent, (row, col)) of every agent still on the board at time t."""
+    return [(agent, path[t]) for agent, path in enumerate(paths) if t < len(path)]
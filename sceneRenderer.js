@@ -0,0 +1,106 @@
+// Client-side drawing of the JSON scenes returned by the /api/scene
+// endpoints. `step` selects how far into the animation to draw.
+import React, { useEffect, useRef } from 'react';
+
+const drawGrid = (ctx, scene, step) => {
+  const size = scene.cellSize;
+  const fillCell = ([row, col], color) => {
+    ctx.fillStyle = color;
+    ctx.fillRect(col * size, row * size, size, size);
+  };
+  ctx.fillStyle = 'white';
+  ctx.fillRect(0, 0, scene.width, scene.height);
+  scene.obstacles.forEach(cell => fillCell(cell, 'red'));
+  ctx.strokeStyle = 'black';
+  ctx.lineWidth = 1;
+  for (let row = 0; row < scene.rows; row++) {
+    for (let col = 0; col < scene.cols; col++) {
+      ctx.strokeRect(col * size + 0.5, row * size + 0.5, size - 1, size - 1);
+    }
+  }
+  fillCell(scene.start, 'blue');
+  fillCell(scene.exit, 'lime');
+  const current = scene.path[step - 1];
+  if (current) {
+    ctx.strokeStyle = 'blue';
+    ctx.lineWidth = 3;
+    ctx.strokeRect(current[1] * size + 1.5, current[0] * size + 1.5, size - 3, size - 3);
+  }
+};
+
+const drawTreeRow = (ctx, scene, step) => {
+  const marked = new Set(scene.solution.slice(0, step));
+  ctx.fillStyle = 'white';
+  ctx.fillRect(0, 0, scene.width, scene.height);
+  ctx.font = '14px sans-serif';
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'middle';
+  scene.trees.forEach((tree, i) => {
+    // Long rows only send the trees in view, each with its row index
+    ctx.fillStyle = marked.has(tree.index ?? i) ? 'rgb(200, 0, 0)' : 'rgb(0, 200, 0)';
+    ctx.fillRect(tree.x, tree.y, scene.treeWidth, scene.treeHeight);
+    ctx.fillStyle = 'black';
+    ctx.fillText(String(tree.value), tree.x + scene.treeWidth / 2, tree.y + scene.treeHeight + 20);
+  });
+};
+
+const drawBST = (ctx, scene, step) => {
+  const visible = scene.nodes.filter(node => node.level < step);
+  ctx.fillStyle = 'rgb(34, 139, 34)';
+  ctx.fillRect(0, 0, scene.width, scene.height);
+  ctx.strokeStyle = 'black';
+  ctx.lineWidth = 3;
+  visible.forEach(node => {
+    if (node.parent !== null) {
+      const parent = scene.nodes[node.parent];
+      ctx.beginPath();
+      ctx.moveTo(parent.x, parent.y);
+      ctx.lineTo(node.x, node.y);
+      ctx.stroke();
+    }
+  });
+  ctx.font = '18px sans-serif';
+  ctx.textAlign = 'center';
+  ctx.textBaseline = 'middle';
+  visible.forEach(node => {
+    ctx.fillStyle = 'rgb(50, 150, 50)';
+    ctx.beginPath();
+    ctx.arc(node.x, node.y, scene.nodeSize / 2, 0, 2 * Math.PI);
+    ctx.fill();
+    ctx.lineWidth = 2;
+    ctx.stroke();
+    ctx.fillStyle = 'black';
+    ctx.fillText(String(node.value), node.x, node.y);
+  });
+};
+
+const DRAWERS = { grid: drawGrid, treeRow: drawTreeRow, bst: drawBST };
+
+// Number of animation steps a scene has after its initial state
+export const sceneSteps = (scene) => {
+  if (!scene) return 0;
+  if (scene.type === 'grid') return scene.path.length + 1;
+  if (scene.type === 'treeRow') return scene.solution.length;
+  return Math.max(0, ...scene.nodes.map(node => node.level + 1));
+};
+
+export const SceneCanvas = ({ scene, step, style, onClick }) => {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    if (scene && canvasRef.current) {
+      DRAWERS[scene.type](canvasRef.current.getContext('2d'), scene, step);
+    }
+  }, [scene, step]);
+
+  if (!scene) return null;
+  return (
+    <canvas
+      ref={canvasRef}
+      width={scene.width}
+      height={scene.height}
+      style={style}
+      onClick={onClick}
+    />
+  );
+};
@@ -0,0 +1,474 @@
+import heapq
+
+import numpy as np
+
+from grid_engine import INF, SQRT2
+from timing import span
+
+# Every strategy takes (grid, start) and returns (path, expanded): the list
+# of (row, col) steps from start to grid.exit inclusive ([] when the exit is
+# unreachable) and the number of nodes taken off the open list. Only the
+# WEIGHTED strategies handle terrain costs and diagonal moves; the others
+# assume a uniform grid (Grid.uniform).
+
+
+def _trace(grid, parents, index):
+    path = []
+    while index != -1:
+        path.append(grid.position(index))
+        index = int(parents[index])
+    path.reverse()
+    return path
+
+
+def _manhattan(grid, index, goal):
+    row, col = divmod(index, grid.cols)
+    goal_row, goal_col = divmod(goal, grid.cols)
+    return abs(row - goal_row) + abs(col - goal_col)
+
+
+def _heuristic(grid, goal):
+    """Admissible estimate of the cost to ``goal`` for astar.
+
+    Manhattan distance on 4-connected grids, octile distance with diagonal
+    moves, both scaled by the cheapest entry cost on the board.
+    """
+    scale = 1.0 if grid.cost is None else float(grid.cost.min())
+    cols = grid.cols
+    goal_row, goal_col = divmod(goal, cols)
+    if not grid.diagonal:
+        if scale == 1.0:
+            return lambda index: _manhattan(grid, index, goal)
+        return lambda index: scale * _manhattan(grid, index, goal)
+
+    def octile(index):
+        row, col = divmod(index, cols)
+        d_row, d_col = abs(row - goal_row), abs(col - goal_col)
+        return scale * (max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col))
+    return octile
+
+
+def dijkstra(grid, start):
+    grid.reset()
+    distance = grid.distance
+    previous = grid.previous
+    start_index = grid.index(*start)
+    exit_index = grid.exit.index
+    distance[start_index] = 0
+    queue = [(0, start_index)]
+    expanded = 0
+
+    while queue:
+        current_dist, index = heapq.heappop(queue)
+
+        if index == exit_index:
+            break
+        if current_dist > distance[index]:
+            continue
+        expanded += 1
+
+        for neighbor, step in grid.moves(index):
+            new_dist = current_dist + step
+            if new_dist < distance[neighbor]:
+                distance[neighbor] = new_dist
+                previous[neighbor] = index
+                heapq.heappush(queue, (new_dist, neighbor))
+
+    if distance[exit_index] == INF:
+        return [], expanded
+    return _trace(grid, previous, exit_index), expanded
+
+
+def astar(grid, start):
+    grid.reset()
+    distance = grid.distance
+    previous = grid.previous
+    start_index = grid.index(*start)
+    exit_index = grid.exit.index
+    heuristic = _heuristic(grid, exit_index)
+    distance[start_index] = 0
+    # Ties on f are broken towards the larger g, i.e. deeper nodes first
+    queue = [(heuristic(start_index), 0, start_index)]
+    expanded = 0
+
+    while queue:
+        _, neg_dist, index = heapq.heappop(queue)
+        current_dist = -neg_dist
+
+        if index == exit_index:
+            break
+        if current_dist > distance[index]:
+            continue
+        expanded += 1
+
+        for neighbor, step in grid.moves(index):
+            new_dist = current_dist + step
+            if new_dist < distance[neighbor]:
+                distance[neighbor] = new_dist
+                previous[neighbor] = index
+                f = new_dist + heuristic(neighbor)
+                heapq.heappush(queue, (f, -new_dist, neighbor))
+
+    if distance[exit_index] == INF:
+        return [], expanded
+    return _trace(grid, previous, exit_index), expanded
+
+
+def bidirectional_bfs(grid, start):
+    obstacles = grid.obstacles
+    start_index = grid.index(*start)
+    exit_index = grid.exit.index
+    if start_index == exit_index:
+        return [grid.position(start_index)], 0
+
+    # parents/depth per direction: index -> parent index / BFS depth
+    forward = {start_index: -1}
+    backward = {exit_index: -1}
+    forward_depth = {start_index: 0}
+    backward_depth = {exit_index: 0}
+    forward_frontier = [start_index]
+    backward_frontier = [exit_index]
+    expanded = 0
+
+    while forward_frontier and backward_frontier:
+        # Always grow the smaller frontier by one full level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, depth = forward_frontier, forward, forward_depth
+            other, other_depth = backward, backward_depth
+        else:
+            frontier, parents, depth = backward_frontier, backward, backward_depth
+            other, other_depth = forward, forward_depth
+
+        best = None
+        next_frontier = []
+        for index in frontier:
+            expanded += 1
+            for neighbor in grid.neighbors(index):
+                if obstacles[neighbor]:
+                    continue
+                if neighbor in other:
+                    length = depth[index] + 1 + other_depth[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, index, neighbor)
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = index
+                depth[neighbor] = depth[index] + 1
+                next_frontier.append(neighbor)
+
+        if best is not None:
+            _, index, neighbor = best
+            if parents is forward:
+                meet_forward, meet_backward = index, neighbor
+            else:
+                meet_forward, meet_backward = neighbor, index
+            path = _trace(grid, forward, meet_forward)
+            current = meet_backward
+            while current != -1:
+                path.append(grid.position(current))
+                current = backward[current]
+            return path, expanded
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return [], expanded
+
+
+def _jump_targets(events, free, step):
+    """Where a straight jump along axis 1 lands from every cell.
+
+    A jump from (r, c) moves step (+1 or -1) columns at a time and stops at
+    the first event (a blocked cell, or a cell it stops on); it lands there
+    if that cell is free. Returns the landing column of every cell, or -1
+    where the jump runs into a wall or off the board. This is a run-length
+    lookup: the next event of every cell comes from one accumulate over
+    2 * column + blocked, so the nearest event carries whether it is a wall.
+    """
+    rows, cols = events.shape
+    # Off the board counts as a wall on both sides
+    edge = 2 * cols + 1 if step > 0 else -1
+    codes = np.where(events, 2 * np.arange(cols, dtype=np.int32) + ~free, edge)
+    target = np.full((rows, cols), edge, dtype=np.int32)
+    if step > 0:
+        target[:, :-1] = np.minimum.accumulate(codes[:, :0:-1], axis=1)[:, ::-1]
+    else:
+        target[:, 1:] = np.maximum.accumulate(codes[:, :-1], axis=1)
+    return np.where(target & 1, -1, target >> 1)
+
+
+def jump_point_search(grid, start):
+    """Jump point search for 4-connected grids.
+
+    Horizontal moves are canonical: a horizontal jump only stops at the
+    goal or at a forced neighbor (an open cell above/below whose
+    predecessor column is blocked), and a vertical jump stops wherever a
+    horizontal jump from it would. Every jump is looked up in tables built
+    for the whole board with _jump_targets instead of scanned cell by cell.
+    """
+    rows, cols = grid.rows, grid.cols
+    start_row, start_col = start
+    exit_row, exit_col = grid.exit.row, grid.exit.col
+
+    # Free cells, padded with a blocked border
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.bool_)
+    padded[1:-1, 1:-1] = ~grid.obstacles.reshape(rows, cols)
+    open_cells = padded[1:-1, 1:-1]
+    is_exit = np.zeros((rows, cols), dtype=np.bool_)
+    is_exit[exit_row, exit_col] = True
+
+    def forced(dx):
+        # Open above or below, with that row blocked one column back
+        behind = slice(1 - dx, cols + 1 - dx)
+        return ((padded[:-2, 1:-1] & ~padded[:-2, behind])
+                | (padded[2:, 1:-1] & ~padded[2:, behind]))
+
+    # Every jump stops at walls and at the exit
+    stops = ~open_cells | is_exit
+    right = _jump_targets(stops | forced(1), open_cells, 1)
+    left = _jump_targets(stops | forced(-1), open_cells, -1)
+    # Vertical jumps stop where either horizontal jump lands somewhere
+    turns = np.ascontiguousarray(((right >= 0) | (left >= 0) | stops).T)
+    columns = np.ascontiguousarray(open_cells.T)
+    down = _jump_targets(turns, columns, 1)
+    up = _jump_targets(turns, columns, -1)
+
+    def free(row, col):
+        return bool(padded[row + 1, col + 1])
+
+    def jump_horizontal(row, col, dx):
+        target = int((right if dx > 0 else left)[row, col])
+        return (row, target) if target >= 0 else None
+
+    def jump_vertical(row, col, dy):
+        target = int((down if dy > 0 else up)[col, row])
+        return (target, col) if target >= 0 else None
+
+    def successors(row, col, direction):
+        if direction is None:
+            moves = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+        elif direction[0] == 0:
+            dx = direction[1]
+            moves = [direction]
+            for dy in (-1, 1):
+                if free(row + dy, col) and not free(row + dy, col - dx):
+                    moves.append((dy, 0))
+        else:
+            moves = [direction, (0, -1), (0, 1)]
+        for dy, dx in moves:
+            if dy == 0:
+                point = jump_horizontal(row, col, dx)
+            else:
+                point = jump_vertical(row, col, dy)
+            if point:
+                yield point, (dy, dx)
+
+    if (start_row, start_col) == (exit_row, exit_col):
+        return [(start_row, start_col)], 0
+
+    goal = (exit_row, exit_col)
+    g = {(start_row, start_col): 0}
+    parents = {(start_row, start_col): None}
+    queue = [(abs(start_row - exit_row) + abs(start_col - exit_col), 0,
+              (start_row, start_col), None)]
+    expanded = 0
+
+    while queue:
+        _, neg_dist, point, direction = heapq.heappop(queue)
+        current_dist = -neg_dist
+        if point == goal:
+            break
+        if current_dist > g[point]:
+            continue
+        expanded += 1
+
+        for successor, move in successors(point[0], point[1], direction):
+            new_dist = current_dist + abs(successor[0] - point[0]) + abs(successor[1] - point[1])
+            if new_dist < g.get(successor, INF):
+                g[successor] = new_dist
+                parents[successor] = point
+                f = new_dist + abs(successor[0] - exit_row) + abs(successor[1] - exit_col)
+                heapq.heappush(queue, (f, -new_dist, successor, move))
+
+    if goal not in parents:
+        return [], expanded
+
+    # Expand the straight segments between consecutive jump points
+    points = []
+    point = goal
+    while point is not None:
+        points.append(point)
+        point = parents[point]
+    points.reverse()
+    path = [points[0]]
+    for (row, col), (next_row, next_col) in zip(points, points[1:]):
+        dy = (next_row > row) - (next_row < row)
+        dx = (next_col > col) - (next_col < col)
+        while (row, col) != (next_row, next_col):
+            row, col = row + dy, col + dx
+            path.append((row, col))
+    return path, expanded
+
+
+def _frontier_neighbors(grid, frontier):
+    """All in-bounds 4-connected (neighbor, source) index pairs of a frontier.
+
+    Indices may be offset by a multiple of grid.size (one layer per field in
+    distance_fields); neighbors stay in the layer of their source.
+    """
+    cols = grid.cols
+    cell = frontier % grid.size
+    column = cell % cols
+    steps = (
+        (cell >= cols, -cols),
+        (cell < grid.size - cols, cols),
+        (column > 0, -1),
+        (column < cols - 1, 1),
+    )
+    neighbors = np.concatenate([frontier[mask] + step for mask, step in steps])
+    sources = np.concatenate([frontier[mask] for mask, _ in steps])
+    return neighbors, sources
+
+
+def distance_fields(grid, exits):
+    """Reverse BFS from several exits (flat indices) at once.
+
+    Every exit gets its own layer of one stacked array and all layers are
+    expanded together, a frontier level per NumPy pass. Returns (distance,
+    next_hop) of shape (len(exits), grid.size), laid out as distance_field.
+    """
+    size = grid.size
+    exits = np.asarray(exits, dtype=np.int64)
+    distance = np.full(len(exits) * size, -1, dtype=np.int32)
+    next_hop = np.full(len(exits) * size, -1, dtype=np.int64)
+
+    frontier = (np.arange(len(exits), dtype=np.int64) * size + exits)[~grid.obstacles[exits]]
+    distance[frontier] = 0
+    level = 0
+    while frontier.size:
+        level += 1
+        neighbors, sources = _frontier_neighbors(grid, frontier)
+        keep = (distance[neighbors] == -1) & ~grid.obstacles[neighbors % size]
+        neighbors, first = np.unique(neighbors[keep], return_index=True)
+        distance[neighbors] = level
+        next_hop[neighbors] = sources[keep][first] % size
+        frontier = neighbors
+    return distance.reshape(-1, size), next_hop.reshape(-1, size)
+
+
+def distance_field(grid):
+    """Reverse BFS from grid.exit over the whole board.
+
+    Returns (distance, next_hop): flat arrays holding the number of steps to
+    the exit (-1 when unreachable) and the index of the neighbor one step
+    closer to it (-1 at the exit and for unreachable cells).
+    """
+    distance, next_hop = distance_fields(grid, [grid.exit.index])
+    return distance[0], next_hop[0]
+
+
+def field_path(grid, field, start):
+    """Walk the next-hop gradient of a distance field from start to the exit."""
+    distance, next_hop = field
+    index = grid.index(*start)
+    if distance[index] < 0:
+        return []
+    path = [start]
+    while distance[index] > 0:
+        index = int(next_hop[index])
+        path.append(grid.position(index))
+    return path
+
+
+def gradient(grid, start):
+    if grid.field is None:
+        grid.field = distance_field(grid)
+    return field_path(grid, grid.field, start), 0
+
+
+STRATEGIES = {
+    'dijkstra': dijkstra,
+    'astar': astar,
+    'bibfs': bidirectional_bfs,
+    'jps': jump_point_search,
+    'field': gradient,
+}
+
+
+# Strategies that honour Grid.cost and Grid.diagonal
+WEIGHTED = {'dijkstra', 'astar'}
+
+
+def solve(grid, start, algorithm='dijkstra'):
+    if not grid.uniform and algorithm not in WEIGHTED:
+        raise ValueError(f'{algorithm} needs a unit-cost 4-connected grid; use one of {sorted(WEIGHTED)}')
+    with span('solve'):
+        return STRATEGIES[algorithm](grid, start)
+
+
+# Cells of stacked distance fields held at once by solve_batch
+BATCH_CELLS = 1 << 24
+
+
+def _walk(fields, layers, starts, lengths):
+    """Follow next_hop from every start at once; column q is query q's path."""
+    next_hop = fields[1]
+    walk = np.empty((int(lengths.max(initial=0)) + 1, len(starts)), dtype=np.int64)
+    walk[0] = starts
+    for step in range(1, len(walk)):
+        hop = next_hop[layers, walk[step - 1]]
+        walk[step] = np.where(lengths >= step, hop, walk[step - 1])
+    return walk
+
+
+def solve_batch(grid, starts, exits, paths=True):
+    """Shortest paths for many (start, exit) pairs on one board.
+
+    Pairs are grouped by exit and each group is answered from one layer of
+    distance_fields, so the cost is one vectorised BFS per distinct exit
+    rather than one search per pair. ``starts`` and ``exits`` are sequences
+    of (row, col). Returns (lengths, paths): step counts (-1 when
+    unreachable) and the paths as in the strategies above, or None for
+    paths when ``paths`` is false.
+    """
+    starts = np.array([grid.index(*start) for start in starts], dtype=np.int64).reshape(-1)
+    exits = np.array([grid.index(*exit) for exit in exits], dtype=np.int64).reshape(-1)
+    lengths = np.full(len(starts), -1, dtype=np.int64)
+    found = [[] for _ in starts] if paths else None
+
+    unique_exits, group = np.unique(exits, return_inverse=True)
+    chunk = max(1, BATCH_CELLS // grid.size)
+    for first in range(0, len(unique_exits), chunk):
+        fields = distance_fields(grid, unique_exits[first:first + chunk])
+        queries = np.flatnonzero((group >= first) & (group < first + chunk))
+        layers = group[queries] - first
+        chunk_lengths = fields[0][layers, starts[queries]].astype(np.int64)
+        lengths[queries] = chunk_lengths
+        if not paths:
+            continue
+        rows, cols = np.divmod(_walk(fields, layers, starts[queries], chunk_lengths), grid.cols)
+        rows, cols = rows.T.tolist(), cols.T.tolist()
+        for q, query in enumerate(queries.tolist()):
+            steps = int(chunk_lengths[q]) + 1
+            found[query] = list(zip(rows[q][:steps], cols[q][:steps])) if steps else []
+    return lengths.tolist(), found
+
+
+def solve_queries(grids, queries, paths=True):
+    """Answer (board, start, exit) queries against a list of grids.
+
+    Queries are grouped by board and each group goes through solve_batch.
+    Returns (length, path) per query, in query order.
+    """
+    by_board = {}
+    for number, (board, start, exit) in enumerate(queries):
+        by_board.setdefault(board, []).append((number, start, exit))
+    results = [None] * len(queries)
+    for board, group in by_board.items():
+        numbers, starts, exits = zip(*group)
+        lengths, found = solve_batch(grids[board], starts, exits, paths)
+        for i, number in enumerate(numbers):
+            results[number] = (lengths[i], found[i] if paths else None)
+    return results
@@ -0,0 +1,256 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask import g, request
+from werkzeug.local import LocalProxy
+
+SESSION_COOKIE = 'session_id'
+SESSION_HEADER = 'X-Session-Id'
+
+# Defaults for both backends: sessions idle for longer than IDLE_TIMEOUT
+# seconds are dropped, and at most MAX_SESSIONS sessions and MAX_BYTES of
+# session state are kept (least recently used first out).
+IDLE_TIMEOUT = 30 * 60
+MAX_SESSIONS = 1000
+MAX_BYTES = 1 << 30
+
+
+def state_size(state):
+    """Bytes held by a state object, as reported by its ``nbytes``, or 0."""
+    return getattr(state, 'nbytes', 0)
+
+
+class SessionStore:
+    """Maps session ids to per-user state objects.
+
+    ``session(sid)`` is a context manager that holds the session's lock for
+    the duration of the block and yields its state, creating it with the
+    store's factory on first use.
+    """
+
+    def __init__(self, factory, idle_timeout=IDLE_TIMEOUT, max_sessions=MAX_SESSIONS, max_bytes=MAX_BYTES):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+
+    @contextmanager
+    def session(self, sid):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class LocalSessionStore(SessionStore):
+    """In-process store for threaded servers: one lock per session.
+
+    Live states are kept, so the byte budget counts what each state reports
+    through ``nbytes`` at the end of its last request.
+    """
+
+    def __init__(self, factory, **kwargs):
+        super().__init__(factory, **kwargs)
+        self._lock = threading.Lock()
+        # sid -> [state, lock, last_used, nbytes], least recently used first
+        self._sessions = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now, keep):
+        for sid, (_, lock, last_used, nbytes) in list(self._sessions.items()):
+            if (now - last_used <= self.idle_timeout and len(self._sessions) <= self.max_sessions
+                    and self._bytes <= self.max_bytes):
+                break
+            # A session in use, or about to be used by this request, is never
+            # evicted from under it
+            if sid == keep or lock.locked():
+                continue
+            del self._sessions[sid]
+            self._bytes -= nbytes
+
+    @contextmanager
+    def session(self, sid):
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                entry = [self.factory(), threading.Lock(), now, 0]
+                self._sessions[sid] = entry
+            entry[2] = now
+            self._sessions.move_to_end(sid)
+            self._evict(now, sid)
+        with entry[1]:
+            try:
+                yield entry[0]
+            finally:
+                nbytes = state_size(entry[0])
+                with self._lock:
+                    if self._sessions.get(sid) is entry:
+                        self._bytes += nbytes - entry[3]
+                    entry[2], entry[3] = time.time(), nbytes
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store shared by every worker process through one SQLite file.
+
+    State is pickled between requests. A session is locked across processes
+    with a lease row: a worker owns the session until it writes the state
+    back, or until LEASE seconds pass if it died mid-request. Rows are keyed
+    by the factory name as well, so apps sharing a database file (and a
+    localhost cookie) do not read each other's state. The byte budget counts
+    the pickled rows.
+    """
+
+    LEASE = 30
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, factory, path='sessions.db', **kwargs):
+        super().__init__(factory, **kwargs)
+        self.path = path
+        self._local = threading.local()
+        # Threads of this process queue on a local lock before polling the
+        # lease; sid -> [lock, threads using it], dropped when no thread is
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'id TEXT PRIMARY KEY, data BLOB, last_used REAL, locked_until REAL DEFAULT 0)'
+            )
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _thread_lock(self, sid):
+        with self._locks_lock:
+            entry = self._locks.setdefault(sid, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[sid]
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def _acquire(self, db, sid):
+        db.execute(
+            'INSERT OR IGNORE INTO sessions (id, data, last_used, locked_until) VALUES (?, NULL, ?, 0)',
+            (sid, time.time())
+        )
+        while True:
+            now = time.time()
+            acquired = db.execute(
+                'UPDATE sessions SET locked_until = ?, last_used = ? WHERE id = ? AND locked_until < ?',
+                (now + self.LEASE, now, sid, now)
+            ).rowcount
+            if acquired:
+                return db.execute('SELECT data FROM sessions WHERE id = ?', (sid,)).fetchone()[0]
+            time.sleep(self.POLL_INTERVAL)
+
+    def _evict(self, db, now):
+        db.execute(
+            'DELETE FROM sessions WHERE last_used < ? AND locked_until < ?',
+            (now - self.idle_timeout, now)
+        )
+        db.execute(
+            'DELETE FROM sessions WHERE locked_until < ? AND id NOT IN '
+            '(SELECT id FROM sessions ORDER BY last_used DESC LIMIT ?)',
+            (now, self.max_sessions)
+        )
+        db.execute(
+            'DELETE FROM sessions WHERE locked_until < ? AND id IN (SELECT id FROM '
+            '(SELECT id, SUM(LENGTH(data)) OVER (ORDER BY last_used DESC) AS total FROM sessions) '
+            'WHERE total > ?)',
+            (now, self.max_bytes)
+        )
+
+    @contextmanager
+    def session(self, sid):
+        db = self._connect()
+        sid = f'{self.factory.__name__}:{sid}'
+        with self._thread_lock(sid):
+            data = self._acquire(db, sid)
+            state = pickle.loads(data) if data is not None else self.factory()
+            try:
+                yield state
+            finally:
+                now = time.time()
+                db.execute(
+                    'UPDATE sessions SET data = ?, last_used = ?, locked_until = 0 WHERE id = ?',
+                    (pickle.dumps(state, pickle.HIGHEST_PROTOCOL), now, sid)
+                )
+                self._evict(db, now)
+
+
+def create_store(factory):
+    """Build the store selected by the SESSION_STORE environment variable.
+
+    ``memory`` (the default) keeps sessions in this process;
+    ``sqlite:<path>`` shares them between worker processes.
+    """
+    backend = os.environ.get('SESSION_STORE', 'memory')
+    if backend.startswith('sqlite:'):
+        return SQLiteSessionStore(factory, path=backend[len('sqlite:'):])
+    if backend == 'memory':
+        return LocalSessionStore(factory)
+    raise ValueError(f'Unknown SESSION_STORE: {backend}')
+
+
+def install(app, store, on_load=None, exempt=()):
+    """Give every request of ``app`` its own locked session state.
+
+    The session id comes from the X-Session-Id header or the session
+    cookie (a new id is issued as a cookie otherwise). The state is held
+    from before_request until teardown, so streamed responses wrapped in
+    stream_with_context keep it until the last chunk. ``on_load`` is called
+    with the state after it is fetched, e.g. to rebuild surfaces that are
+    not pickled. Endpoints in ``exempt`` run without a session.
+
+    Returns a proxy to the current request's state.
+    """
+
+    @app.before_request
+    def open_session():
+        if request.endpoint in exempt:
+            return
+        sid = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        g.new_session = not sid
+        g.session_id = sid or uuid.uuid4().hex
+        g.session_context = store.session(g.session_id)
+        g.state = g.session_context.__enter__()
+        if on_load:
+            on_load(g.state)
+
+    @app.after_request
+    def set_session_cookie(response):
+        if g.get('new_session'):
+            response.set_cookie(SESSION_COOKIE, g.session_id, httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def close_session(exc):
+        context = g.pop('session_context', None)
+        if context is not None:
+            context.__exit__(None, None, None)
+
+    return LocalProxy(lambda: g.state)
@@ -0,0 +1,215 @@
+"""Maximum subarray: a one-off Kadane scan and a segment tree for live edits.
+
+kadane() answers the whole array in one vectorised pass. MaxSubarrayTree
+keeps, for every node, the (sum, best prefix, best suffix, best) of its
+range together with where they start and end, so a point update and a
+"maximum subarray within [l, r]" query each touch O(log n) nodes.
+
+The tree is the bottom-up kind with 2n slots: leaves n..2n-1 are the values
+themselves and are not stored, internal nodes 1..n-1 are. For n that is not
+a power of two some internal nodes mix unrelated ranges, but a query only
+ever combines nodes that lie inside [l, r], left to right.
+
+solve_file() handles arrays too large for memory: a raw binary file of
+integers is memory-mapped, cut into chunks, each chunk is reduced to one
+node on a process pool, and the nodes are combined in order. Run it as
+
+    python subarray.py values.bin --dtype <i4
+"""
+import argparse
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Rows of MaxSubarrayTree._totals and ._spans
+SUM, PREFIX, SUFFIX, BEST = range(4)
+PREFIX_END, SUFFIX_START, BEST_START, BEST_END = range(4)
+
+# Values per chunk of solve_file; each worker holds a few arrays of this size
+CHUNK_VALUES = 1 << 22
+WORKERS = os.cpu_count() or 1
+
+
+def kadane(values):
+    """(best, start, end) of a maximum-sum subarray, end inclusive."""
+    node = summarise(values)
+    return node[BEST], node[4 + BEST_START], node[4 + BEST_END]
+
+
+def summarise(values, offset=0):
+    """The _combine node of a whole array, with indices shifted by offset.
+
+    Kadane's scan, vectorised: the best subarray ending at j is the prefix
+    sum up to j minus the smallest prefix sum before it. Ties go to the
+    shortest prefix and suffix, as in _combine.
+    """
+    prefix = np.cumsum(values, dtype=np.int64)
+    before = np.concatenate(([0], prefix[:-1]))
+    total = int(prefix[-1])
+    prefix_end = int(np.argmax(prefix))
+    # The suffix from k sums to total - before[k]; take the latest k
+    suffix_start = before.size - 1 - int(np.argmin(before[::-1]))
+    gains = prefix - np.minimum.accumulate(before)
+    end = int(np.argmax(gains))
+    start = int(np.argmin(before[:end + 1]))
+    return (
+        total, int(prefix[prefix_end]), total - int(before[suffix_start]), int(gains[end]),
+        prefix_end + offset, suffix_start + offset, start + offset, end + offset
+    )
+
+
+def _combine(left, right):
+    """Node of two adjacent ranges; nodes are (sum, prefix, suffix, best, prefix_end, suffix_start, best_start, best_end)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    l_sum, l_pre, l_suf, l_best, l_pre_end, l_suf_start, l_start, l_end = left
+    r_sum, r_pre, r_suf, r_best, r_pre_end, r_suf_start, r_start, r_end = right
+    prefix, prefix_end = (l_pre, l_pre_end) if l_pre >= l_sum + r_pre else (l_sum + r_pre, r_pre_end)
+    suffix, suffix_start = (r_suf, r_suf_start) if r_suf >= r_sum + l_suf else (r_sum + l_suf, l_suf_start)
+    best, start, end = l_best, l_start, l_end
+    if l_suf + r_pre > best:
+        best, start, end = l_suf + r_pre, l_suf_start, r_pre_end
+    if r_best > best:
+        best, start, end = r_best, r_start, r_end
+    return (l_sum + r_sum, prefix, suffix, best, prefix_end, suffix_start, start, end)
+
+
+class MaxSubarrayTree:
+
+    def __init__(self, values):
+        self.values = np.array(values, dtype=np.int64)
+        if self.values.ndim != 1 or not self.values.size:
+            raise ValueError('values must be a non-empty list of integers')
+        n = self.n = self.values.size
+        self._totals = np.zeros((4, n), dtype=np.int64)
+        self._spans = np.zeros((4, n), dtype=np.int64)
+        # Children of nodes in [lo, hi) are all >= hi, so each block only
+        # needs blocks already built
+        hi = n
+        while hi > 1:
+            lo = (hi + 1) // 2
+            self._build(np.arange(lo, hi))
+            hi = lo
+
+    def __len__(self):
+        return self.n
+
+    def _gather(self, nodes):
+        """Rows of the given nodes as arrays, with leaves expanded from the values."""
+        leaf = nodes >= self.n
+        internal = np.where(leaf, 0, nodes)
+        position = np.where(leaf, nodes - self.n, 0)
+        value = self.values[position]
+        totals = np.where(leaf, value, self._totals[:, internal])
+        spans = np.where(leaf, position, self._spans[:, internal])
+        return totals, spans
+
+    def _build(self, nodes):
+        (l_sum, l_pre, l_suf, l_best), l_spans = self._gather(2 * nodes)
+        (r_sum, r_pre, r_suf, r_best), r_spans = self._gather(2 * nodes + 1)
+        totals, spans = self._totals[:, nodes], self._spans[:, nodes]
+
+        totals[SUM] = l_sum + r_sum
+        keep = l_pre >= l_sum + r_pre
+        totals[PREFIX] = np.where(keep, l_pre, l_sum + r_pre)
+        spans[PREFIX_END] = np.where(keep, l_spans[PREFIX_END], r_spans[PREFIX_END])
+        keep = r_suf >= r_sum + l_suf
+        totals[SUFFIX] = np.where(keep, r_suf, r_sum + l_suf)
+        spans[SUFFIX_START] = np.where(keep, r_spans[SUFFIX_START], l_spans[SUFFIX_START])
+
+        # Same order of preference as _combine: left, crossing, right
+        best = l_best.copy()
+        start, end = l_spans[BEST_START].copy(), l_spans[BEST_END].copy()
+        cross = l_suf + r_pre
+        better = cross > best
+        best[better], start[better], end[better] = cross[better], l_spans[SUFFIX_START][better], r_spans[PREFIX_END][better]
+        better = r_best > best
+        best[better], start[better], end[better] = r_best[better], r_spans[BEST_START][better], r_spans[BEST_END][better]
+        totals[BEST], spans[BEST_START], spans[BEST_END] = best, start, end
+
+        self._totals[:, nodes], self._spans[:, nodes] = totals, spans
+
+    def _node(self, node):
+        if node >= self.n:
+            position = node - self.n
+            value = int(self.values[position])
+            return (value, value, value, value, position, position, position, position)
+        return tuple(self._totals[:, node].tolist() + self._spans[:, node].tolist())
+
+    def update(self, index, value):
+        """Set values[index] and recombine the nodes above it."""
+        if not 0 <= index < self.n:
+            raise IndexError(f'Index {index} is outside 0..{self.n - 1}')
+        self.values[index] = value
+        node = (index + self.n) // 2
+        while node >= 1:
+            combined = _combine(self._node(2 * node), self._node(2 * node + 1))
+            self._totals[:, node] = combined[:4]
+            self._spans[:, node] = combined[4:]
+            node //= 2
+
+    def query(self, left, right):
+        """(best, start, end) of a maximum subarray within values[left..right], inclusive."""
+        if not 0 <= left <= right < self.n:
+            raise IndexError(f'Range [{left}, {right}] is outside 0..{self.n - 1}')
+        lo, hi = left + self.n, right + self.n + 1
+        head = tail = None
+        while lo < hi:
+            if lo & 1:
+                head = _combine(head, self._node(lo))
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                tail = _combine(self._node(hi), tail)
+            lo //= 2
+            hi //= 2
+        node = _combine(head, tail)
+        return node[BEST], node[4 + BEST_START], node[4 + BEST_END]
+
+    def best(self):
+        """Maximum subarray of the whole array."""
+        return self.query(0, self.n - 1)
+
+
+def _summarise_chunk(path, dtype, start, stop):
+    """Worker side of solve_file: the node of values[start:stop] of the file."""
+    values = np.memmap(path, dtype=dtype, mode='r')
+    return summarise(values[start:stop], start)
+
+
+def solve_file(path, dtype='<i4', chunk=CHUNK_VALUES, workers=WORKERS):
+    """(best, start, end) of the maximum subarray of a raw binary integer file."""
+    count = os.path.getsize(path) // np.dtype(dtype).itemsize
+    if not count:
+        raise ValueError(f'{path} holds no {dtype} values')
+    bounds = [(start, min(start + chunk, count)) for start in range(0, count, chunk)]
+    if workers <= 1 or len(bounds) == 1:
+        nodes = (_summarise_chunk(path, dtype, start, stop) for start, stop in bounds)
+        node = functools.reduce(_combine, nodes)
+    else:
+        with ProcessPoolExecutor(min(workers, len(bounds))) as pool:
+            # map keeps chunk order, which _combine needs
+            nodes = pool.map(_summarise_chunk, *zip(*[(path, dtype, start, stop) for start, stop in bounds]))
+            node = functools.reduce(_combine, nodes)
+    return node[BEST], node[4 + BEST_START], node[4 + BEST_END]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maximum subarray of a raw binary integer file')
+    parser.add_argument('path')
+    parser.add_argument('--dtype', default='<i4', help='NumPy dtype of the values, e.g. <i4 or <i8')
+    parser.add_argument('--chunk', type=int, default=CHUNK_VALUES, help='values per chunk')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+    began = time.perf_counter()
+    best, start, end = solve_file(args.path, args.dtype, args.chunk, args.workers)
+    print(f'best {best} over [{start}, {end}] in {time.perf_counter() - began:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
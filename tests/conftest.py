@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The apps load their images relative to the working directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import pygame
+
+pygame.init()
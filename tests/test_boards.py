@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import boardgen
+import multiagent
+import search
+from catalog import Catalog
+from grid_engine import Grid
+
+
+def board_grid(config):
+    problem = Catalog.from_problems([config])[0]
+    grid = Grid(problem.rows, problem.cols)
+    grid.obstacles[:] = problem.obstacles
+    grid.exit = grid.get_cell(*problem.exit)
+    return grid, problem.start
+
+
+@pytest.mark.parametrize('kind, density', [('maze', None), ('maze', 0.2), ('scatter', 0.4)])
+def test_generated_boards_are_solvable_and_reproducible(kind, density):
+    for number in range(3):
+        config = boardgen.generate(kind, 31, 45, density, seed=4, number=number)
+        again = boardgen.generate(kind, 31, 45, density, seed=4, number=number)
+        assert np.array_equal(config['bitmap'], again['bitmap'])
+        grid, start = board_grid(config)
+        path, _ = search.dijkstra(grid, start)
+        assert path and path[0] == start
+
+
+def test_agents_never_collide():
+    grid, _ = board_grid(boardgen.scatter(20, 20, 0.2, seed=1))
+    starts = multiagent.random_starts(grid, 30, seed=2)
+    paths, _ = multiagent.plan(grid, starts)
+    assert sum(1 for path in paths if path) > 0
+    exit = (grid.exit.row, grid.exit.col)
+    for start, path in zip(starts, paths):
+        if path:
+            assert path[0] == start and path[-1] == exit
+            for (row, col), (next_row, next_col) in zip(path, path[1:]):
+                assert abs(row - next_row) + abs(col - next_col) <= 1
+    for t in range(max(map(len, paths))):
+        cells = [cell for _, cell in multiagent.positions_at(paths, t)]
+        assert len(cells) == len(set(cells))
+        # No two agents swap cells between t and t + 1
+        moves = {(path[t], path[t + 1]) for path in paths if t + 1 < len(path)}
+        assert not any((b, a) in moves for a, b in moves if a != b)
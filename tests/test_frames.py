@@ -0,0 +1,23 @@
+import pygame
+
+import boardgen
+import graph
+from catalog import Catalog
+from frames import encode_patch
+
+
+def test_encode_patch_outside_surface_is_none():
+    surface = pygame.Surface((80, 60))
+    assert encode_patch(surface, pygame.Rect(100, 100, 40, 40)) is None
+    assert encode_patch(surface, pygame.Rect(70, 50, 40, 40))['w'] == 10
+
+
+def test_delta_frames_for_path_leaving_viewport(monkeypatch):
+    # 41 x 41 cells of CELL_SIZE pixels is far larger than the canvas
+    monkeypatch.setattr(graph, 'catalog', Catalog.from_problems([boardgen.maze(41, 41)]))
+    client = graph.app.test_client()
+    assert client.get('/api/init').status_code == 200
+    response = client.get('/api/start?mode=delta')
+    assert response.status_code == 200
+    patches = response.get_json()['patches']
+    assert None in patches
@@ -0,0 +1,44 @@
+import base64
+
+from flask import Flask
+
+from framestore import FrameStore, frame_url, register_frame_routes
+
+
+def make_client(store):
+    app = Flask(__name__)
+    register_frame_routes(app, store)
+    return app.test_client()
+
+
+def test_frames_are_served_and_revalidated():
+    store = FrameStore()
+    client = make_client(store)
+    digest = store.put(b'png bytes')
+    response = client.get(frame_url(digest))
+    assert response.status_code == 200
+    assert response.data == b'png bytes'
+    assert response.headers['ETag'] == f'"{digest}"'
+    assert client.get(frame_url(digest), headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+
+
+def test_unknown_frame_is_404_unless_revalidated():
+    client = make_client(FrameStore())
+    digest = '0' * 64
+    assert client.get(frame_url(digest)).status_code == 404
+    # The hash is the content, so an evicted frame still revalidates
+    assert client.get(frame_url(digest), headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+
+
+def test_store_is_bounded_by_bytes():
+    store = FrameStore(max_bytes=100)
+    digests = [store.put(bytes([i]) * 30) for i in range(5)]
+    assert [digest in store for digest in digests] == [False, False, True, True, True]
+
+
+def test_put_all_refuses_frames_that_would_not_fit():
+    store = FrameStore(max_bytes=400)
+    frames = [base64.b64encode(bytes([i]) * 30).decode() for i in range(3)]
+    digests = store.put_all(frames)
+    assert [store.get(digest) for digest in digests] == [bytes([i]) * 30 for i in range(3)]
+    assert store.put_all(frames * 2) is None
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import grading
+
+PROBLEMS = [{'n': 3, 'start': (0, 0), 'exit': (2, 2), 'obstacles': [(1, 1)]}]
+
+
+def grade(tmp_path, submissions, workers=1):
+    source, dest = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    source.write_text(''.join(
+        (line if isinstance(line, str) else json.dumps(line)) + '\n' for line in submissions
+    ))
+    assert grading.grade_file(str(source), str(dest), problems=PROBLEMS, workers=workers) == len(submissions)
+    return [json.loads(line) for line in dest.read_text().splitlines()]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_grades_paths(tmp_path, workers):
+    optimal = [[0, 0], [0, 1], [0, 2], [1, 2], [2, 2]]
+    longer = [[0, 0], [0, 1], [0, 2], [1, 2], [1, 2], [2, 2]]
+    results = grade(tmp_path, [
+        {'id': 'optimal', 'problem': 0, 'path': optimal},
+        {'id': 'obstacle', 'problem': 0, 'path': [[0, 0], [1, 0], [1, 1], [1, 2], [2, 2]]},
+        {'id': 'jump', 'problem': 0, 'path': [[0, 0], [0, 2], [1, 2], [2, 2]]},
+        {'id': 'repeat', 'problem': 0, 'path': longer},
+    ], workers)
+    assert results[0]['valid'] and results[0]['optimal'] and results[0]['length'] == 4
+    assert results[1]['errors'] == {'obstacle': 2}
+    assert results[2]['errors'] == {'adjacency': 1}
+    # Standing still is not a move to a neighbour
+    assert results[3]['errors'] == {'adjacency': 4}
+
+
+def test_malformed_submissions(tmp_path):
+    results = grade(tmp_path, [
+        'not json',
+        {'id': 'p', 'problem': 5, 'path': [[0, 0]]},
+        {'id': 'b', 'problem': True, 'path': [[0, 0]]},
+        {'id': 'f', 'problem': 0, 'path': [[0.0, 0], [0, 1]]},
+        {'id': 'e', 'problem': 0, 'path': []},
+        {'id': 'o', 'problem': 0, 'path': [[0, 0], [10 ** 30, 0]]},
+    ])
+    assert [result['errors'] for result in results] == [
+        {'format': None}, {'problem': None}, {'problem': None}, {'format': None}, {'empty': None},
+        {'bounds': 1, 'adjacency': 1, 'exit': 1},
+    ]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import search
+from grid_engine import Grid
+from lpastar import LPAStar
+
+
+def random_grid(rng, rows, cols, density):
+    grid = Grid(int(rows), int(cols))
+    grid.obstacles[:] = rng.random(rows * cols) < density
+    start, exit = rng.choice(rows * cols, 2, replace=False)
+    grid.obstacles[[start, exit]] = False
+    grid.exit = grid.cell_at(int(exit))
+    return grid, grid.position(int(start))
+
+
+def assert_valid(grid, path, start):
+    assert path[0] == start and path[-1] == (grid.exit.row, grid.exit.col)
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+        assert not grid.obstacles[grid.index(next_row, next_col)]
+
+
+@pytest.mark.parametrize('algorithm', sorted(set(search.STRATEGIES) - {'dijkstra'}))
+def test_strategies_match_dijkstra(algorithm):
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        grid, start = random_grid(rng, *rng.integers(2, 25, size=2), rng.uniform(0, 0.45))
+        expected, _ = search.dijkstra(grid, start)
+        grid.field = None
+        path, _ = search.solve(grid, start, algorithm)
+        assert len(path) == len(expected)
+        if path:
+            assert_valid(grid, path, start)
+
+
+def test_astar_matches_dijkstra_on_weighted_boards():
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        grid, start = random_grid(rng, 15, 15, 0.2)
+        grid.diagonal = bool(rng.integers(2))
+        grid.set_costs(rng.integers(1, 5, size=grid.size))
+        expected, _ = search.dijkstra(grid, start)
+        cost = grid.distance[grid.exit.index]
+        path, _ = search.astar(grid, start)
+        assert len(path) > 0 or not expected
+        if path:
+            assert grid.distance[grid.exit.index] == pytest.approx(cost)
+
+
+def test_solve_batch_matches_dijkstra():
+    rng = np.random.default_rng(5)
+    grid, _ = random_grid(rng, 20, 30, 0.3)
+    starts = [grid.position(int(i)) for i in rng.choice(grid.size, 40)]
+    exits = [grid.position(int(i)) for i in rng.choice(grid.size, 40)]
+    lengths, paths = search.solve_batch(grid, starts, exits)
+    for start, exit, length, path in zip(starts, exits, lengths, paths):
+        if grid.obstacles[grid.index(*start)] or grid.obstacles[grid.index(*exit)]:
+            continue
+        grid.exit = grid.get_cell(*exit)
+        expected, _ = search.dijkstra(grid, start)
+        assert length == len(expected) - 1
+        if path:
+            assert_valid(grid, path, start)
+
+
+def test_lpastar_tracks_obstacle_toggles():
+    rng = np.random.default_rng(11)
+    grid, start = random_grid(rng, 20, 20, 0.25)
+    planner = LPAStar(grid, start)
+    planner.compute_shortest_path()
+    for _ in range(60):
+        index = int(rng.integers(grid.size))
+        if index in (grid.index(*start), grid.exit.index):
+            continue
+        planner.toggle(*grid.position(index))
+        expected, _ = search.dijkstra(grid, start)
+        path = planner.path()
+        assert len(path) == len(expected)
+        if path:
+            assert_valid(grid, path, start)
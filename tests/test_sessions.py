@@ -0,0 +1,79 @@
+import pickle
+import threading
+
+import graph
+from sessions import LocalSessionStore, SQLiteSessionStore
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+        self.nbytes = 0
+
+
+class OtherCounter(Counter):
+    pass
+
+
+def test_graph_sessions_are_isolated():
+    client = graph.app.test_client()
+    alice, bob = {'X-Session-Id': 'alice'}, {'X-Session-Id': 'bob'}
+    client.get('/api/init', headers=alice)
+    client.get('/api/init', headers=bob)
+    assert client.post('/api/obstacle?row=0&col=1', headers=alice).get_json()['obstacle']
+    assert client.get('/api/next', headers=bob).get_json()['problem'] == 1
+    assert client.get('/api/scene', headers=alice).get_json()['problem'] == 0
+    assert [0, 1] in client.get('/api/scene', headers=alice).get_json()['obstacles']
+    assert [0, 1] not in client.get('/api/scene', headers=bob).get_json()['obstacles']
+
+
+def test_graph_state_pickles_only_the_edits():
+    state = graph.GameState()
+    state.current_problem = 2
+    state.edits = {3}
+    state.path = [(0, 0)]
+    state.planner = object()
+    restored = pickle.loads(pickle.dumps(state))
+    assert (restored.current_problem, restored.edits, restored.path) == (2, {3}, [(0, 0)])
+    assert restored.grid is None and restored.planner is None
+
+
+def test_sqlite_store_isolates_sessions_and_apps(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SQLiteSessionStore(Counter, path=path)
+    other = SQLiteSessionStore(OtherCounter, path=path)
+    for sid in ('a', 'a', 'b'):
+        with store.session(sid) as state:
+            state.count += 1
+    with other.session('a') as state:
+        assert state.count == 0
+    with store.session('a') as state:
+        assert state.count == 2
+    with store.session('b') as state:
+        assert state.count == 1
+
+
+def test_sqlite_store_serialises_requests_and_drops_their_locks(tmp_path):
+    store = SQLiteSessionStore(Counter, path=str(tmp_path / 'sessions.db'))
+
+    def bump():
+        with store.session('a') as state:
+            state.count += 1
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with store.session('a') as state:
+        assert state.count == 8
+    assert not store._locks
+
+
+def test_local_store_evicts_past_its_byte_budget():
+    store = LocalSessionStore(Counter, max_bytes=100)
+    for sid in 'abcde':
+        with store.session(sid) as state:
+            state.nbytes = 40
+    # The budget is checked as each request starts
+    assert list(store._sessions) == ['c', 'd', 'e']
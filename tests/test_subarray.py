@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from subarray import MaxSubarrayTree, kadane, solve_file
+
+
+def brute_force(values, left, right):
+    return max(sum(values[i:j + 1]) for i in range(left, right + 1) for j in range(i, right + 1))
+
+
+def test_kadane_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        values = rng.integers(-10, 10, size=rng.integers(1, 30)).tolist()
+        best, start, end = kadane(values)
+        assert best == brute_force(values, 0, len(values) - 1)
+        assert sum(values[start:end + 1]) == best
+
+
+def test_tree_updates_and_queries_match_brute_force():
+    rng = np.random.default_rng(2)
+    for n in (1, 2, 3, 7, 16, 33):
+        values = rng.integers(-20, 20, size=n).tolist()
+        tree = MaxSubarrayTree(values)
+        for _ in range(50):
+            index = int(rng.integers(n))
+            values[index] = int(rng.integers(-20, 20))
+            tree.update(index, values[index])
+            left, right = sorted(rng.integers(n, size=2).tolist())
+            best, start, end = tree.query(left, right)
+            assert best == brute_force(values, left, right)
+            assert left <= start <= end <= right
+            assert sum(values[start:end + 1]) == best
+
+
+def test_tree_rejects_bad_ranges():
+    tree = MaxSubarrayTree([1, -2, 3])
+    with pytest.raises(IndexError):
+        tree.query(2, 1)
+    with pytest.raises(IndexError):
+        tree.update(3, 0)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_solve_file_matches_kadane(tmp_path, workers):
+    values = np.random.default_rng(3).integers(-1000, 1000, size=10000, dtype=np.int32)
+    path = tmp_path / 'values.bin'
+    values.astype('<i4').tofile(path)
+    assert solve_file(str(path), chunk=777, workers=workers) == kadane(values)
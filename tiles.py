@@ -0,0 +1,140 @@
+"""Tile pyramid for boards larger than one canvas.
+
+The board is cut into TILE_SIZE x TILE_SIZE pixel tiles. At the deepest
+zoom level a cell is ``cell_size`` pixels wide; every level above halves
+that, down to level 0 where the whole board fits in one tile. Only
+requested tiles are rendered and their PNGs are kept in an LRU cache keyed
+by the board fingerprint, so an edited board simply stops hitting the old
+entries.
+
+Close-up tiles (cells of DETAIL_PIXELS or more) are drawn with the sprite
+images cell by cell; smaller cells are rasterised in one NumPy pass from
+the obstacle array, using the sprites' average colours.
+"""
+import math
+
+import numpy as np
+import pygame
+
+from frames import png_bytes
+from lru import LRUCache
+
+TILE_SIZE = 256
+DETAIL_PIXELS = 16
+# Grid lines are only drawn while cells are at least this many pixels wide
+LINE_PIXELS = 4
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+OUTSIDE = (200, 200, 200)
+
+
+class TilePyramid:
+
+    def __init__(self, cell_size, obstacle_img, player_img, exit_img, maxsize=1024):
+        self.cell_size = cell_size
+        self.images = {'obstacle': obstacle_img, 'start': player_img, 'exit': exit_img}
+        self.colors = {
+            name: tuple(pygame.transform.average_color(image))[:3]
+            for name, image in self.images.items()
+        }
+        self._scaled = {}
+        self.cache = LRUCache(maxsize)
+
+    def max_zoom(self, grid):
+        """Deepest level: cells at full size. Level 0 fits the board in one tile."""
+        extent = max(grid.rows, grid.cols) * self.cell_size
+        return max(0, math.ceil(math.log2(extent / TILE_SIZE)))
+
+    def scale(self, grid, z):
+        """Width of one cell in pixels at level z."""
+        return self.cell_size / 2 ** (self.max_zoom(grid) - z)
+
+    def tile_count(self, grid, z):
+        """(columns, rows) of tiles at level z."""
+        scale = self.scale(grid, z)
+        return (
+            math.ceil(grid.cols * scale / TILE_SIZE),
+            math.ceil(grid.rows * scale / TILE_SIZE)
+        )
+
+    def contains(self, grid, z, x, y):
+        if not 0 <= z <= self.max_zoom(grid):
+            return False
+        columns, rows = self.tile_count(grid, z)
+        return 0 <= x < columns and 0 <= y < rows
+
+    def tile(self, grid, z, x, y):
+        """PNG bytes of tile (x, y) at level z, rendered on first request."""
+        key = (grid.fingerprint(), z, x, y)
+        data = self.cache.get(key)
+        if data is None:
+            data = png_bytes(self.render(grid, z, x, y))
+            self.cache.put(key, data)
+        return data
+
+    def render(self, grid, z, x, y):
+        scale = self.scale(grid, z)
+        surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        surface.fill(OUTSIDE)
+        if scale >= DETAIL_PIXELS:
+            self._draw_cells(surface, grid, scale, x, y)
+        else:
+            self._rasterise(surface, grid, scale, x, y)
+        return surface
+
+    def _image(self, name, size):
+        key = (name, size)
+        if key not in self._scaled:
+            self._scaled[key] = pygame.transform.scale(self.images[name], (size, size))
+        return self._scaled[key]
+
+    def _draw_cells(self, surface, grid, scale, x, y):
+        size = round(scale)
+        left, top = x * TILE_SIZE, y * TILE_SIZE
+        first_col, first_row = int(left // scale), int(top // scale)
+        last_col = min(grid.cols, math.ceil((left + TILE_SIZE) / scale))
+        last_row = min(grid.rows, math.ceil((top + TILE_SIZE) / scale))
+        obstacles = grid.obstacles.reshape(grid.rows, grid.cols)
+        special = {}
+        for name, cell in (('start', grid.start), ('exit', grid.exit)):
+            if cell is not None:
+                special.setdefault((cell.row, cell.col), []).append(name)
+
+        for row in range(first_row, last_row):
+            for col in range(first_col, last_col):
+                rect = pygame.Rect(round(col * scale) - left, round(row * scale) - top, size, size)
+                surface.fill(WHITE, rect)
+                if obstacles[row, col]:
+                    surface.blit(self._image('obstacle', size), rect)
+                pygame.draw.rect(surface, BLACK, rect, 1)
+                for name in special.get((row, col), ()):
+                    surface.blit(self._image(name, size), rect)
+
+    def _rasterise(self, surface, grid, scale, x, y):
+        # Board cell under every pixel column / row of the tile, and whether
+        # that pixel is the first of its cell
+        px = x * TILE_SIZE + np.arange(TILE_SIZE)
+        py = y * TILE_SIZE + np.arange(TILE_SIZE)
+        cols, rows = np.floor(px / scale).astype(np.int64), np.floor(py / scale).astype(np.int64)
+        col_lines = cols != np.floor((px - 1) / scale)
+        row_lines = rows != np.floor((py - 1) / scale)
+        inside_cols, inside_rows = cols < grid.cols, rows < grid.rows
+        cols, col_lines = cols[inside_cols], col_lines[inside_cols]
+        rows, row_lines = rows[inside_rows], row_lines[inside_rows]
+
+        obstacles = grid.obstacles.reshape(grid.rows, grid.cols)[np.ix_(rows, cols)]
+        pixels = np.empty(obstacles.shape + (3,), dtype=np.uint8)
+        pixels[:] = WHITE
+        pixels[obstacles] = self.colors['obstacle']
+        if scale >= LINE_PIXELS:
+            pixels[row_lines, :] = BLACK
+            pixels[:, col_lines] = BLACK
+        for name, cell in (('start', grid.start), ('exit', grid.exit)):
+            if cell is not None:
+                pixels[np.ix_(rows == cell.row, cols == cell.col)] = self.colors[name]
+
+        tile = pygame.surfarray.pixels3d(surface)
+        # surfarray is indexed (x, y)
+        tile[:cols.size, :rows.size] = pixels.transpose(1, 0, 2)
+        del tile
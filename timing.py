@@ -0,0 +1,48 @@
+"""Stage timing hooks for library code, with no dependencies.
+
+Algorithms and encoders wrap their work in ``with span('solve'):``. Nothing
+is recorded until an observer is set; the Flask apps set metrics.observe
+through metrics.install(), so search, frames and friends stay importable
+(and free to run) without Flask.
+"""
+import functools
+import time
+from contextlib import contextmanager
+
+# Called as observer(stage, seconds) for every finished span
+_observer = None
+
+
+def set_observer(observer):
+    global _observer
+    _observer = observer
+
+
+def record(stage, seconds):
+    """Record a duration measured by the caller, e.g. one summed over a loop."""
+    if _observer is not None:
+        _observer(stage, seconds)
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as ``stage`` of the current request."""
+    if _observer is None:
+        yield
+        return
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observer(stage, time.perf_counter() - began)
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -71,7 +71,7 @@ def draw_tree(node):
         draw_tree(node.right)
 
 # Animation function using BFS to show levels incrementally
-def animate_balancing(old_root, sorted_array):
+def animate_balancing(old_root, sorted_array, delay=0.5):
     balanced_root = sorted_array_to_bst(sorted_array)
     assign_positions(balanced_root, WIDTH // 2, 50, 200)
     steps = []
@@ -106,58 +106,62 @@ def animate_balancing(old_root, sorted_array):
                 screen.blit(text, (node.x - 10, node.y - 10))  # Center text on leaf
             
         pygame.display.update()
-        time.sleep(0.5)
+        time.sleep(delay)
     return balanced_root
 
 # Main
-running = True
-example_arrays = [
-    [1, 2, 3, 4, 5, 6, 7],
-    [4, 10, 15, 20, 25, 30, 35],
-    [5, 15, 25, 35, 45, 55, 65]
-]
-current_example = 0
-array = example_arrays[current_example].copy()
-array.sort()
-root = build_unbalanced_tree(array)
-assign_positions(root, WIDTH // 2, 50, 200)
-start_button = pygame.Rect(WIDTH // 2 - 100, HEIGHT - 50, 100, 40)
-next_button = pygame.Rect(WIDTH // 2 + 20, HEIGHT - 50, 100, 40)
-balanced = False
+def main():
+    running = True
+    example_arrays = [
+        [1, 2, 3, 4, 5, 6, 7],
+        [4, 10, 15, 20, 25, 30, 35],
+        [5, 15, 25, 35, 45, 55, 65]
+    ]
+    current_example = 0
+    array = example_arrays[current_example].copy()
+    array.sort()
+    root = build_unbalanced_tree(array)
+    assign_positions(root, WIDTH // 2, 50, 200)
+    start_button = pygame.Rect(WIDTH // 2 - 100, HEIGHT - 50, 100, 40)
+    next_button = pygame.Rect(WIDTH // 2 + 20, HEIGHT - 50, 100, 40)
+    balanced = False
 
-while running:
-    screen.blit(BG_IMAGE, (0, 0))  # Green background
+    while running:
+        screen.blit(BG_IMAGE, (0, 0))  # Green background
 
-    draw_tree(root)
+        draw_tree(root)
     
-    # Draw buttons
-    pygame.draw.rect(screen, GREEN if not balanced else GRAY, start_button)
-    start_text = font.render("Start", True, BLACK)
-    screen.blit(start_text, (start_button.x + 25, start_button.y + 10))
+        # Draw buttons
+        pygame.draw.rect(screen, GREEN if not balanced else GRAY, start_button)
+        start_text = font.render("Start", True, BLACK)
+        screen.blit(start_text, (start_button.x + 25, start_button.y + 10))
     
-    next_disabled = current_example >= len(example_arrays) - 1
-    pygame.draw.rect(screen, GRAY if next_disabled else GREEN, next_button)
-    next_text = font.render("Next", True, BLACK)
-    screen.blit(next_text, (next_button.x + 25, next_button.y + 10))
+        next_disabled = current_example >= len(example_arrays) - 1
+        pygame.draw.rect(screen, GRAY if next_disabled else GREEN, next_button)
+        next_text = font.render("Next", True, BLACK)
+        screen.blit(next_text, (next_button.x + 25, next_button.y + 10))
     
-    pygame.display.update()
+        pygame.display.update()
     
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            x, y = event.pos
-            if start_button.collidepoint(x, y) and not balanced:
-                sorted_arr = example_arrays[current_example].copy()
-                sorted_arr.sort()
-                root = animate_balancing(root, sorted_arr)
-                balanced = True
-            elif next_button.collidepoint(x, y) and not next_disabled:
-                current_example += 1
-                array = example_arrays[current_example].copy()
-                array.sort()
-                root = build_unbalanced_tree(array)
-                assign_positions(root, WIDTH // 2, 50, 200)
-                balanced = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = event.pos
+                if start_button.collidepoint(x, y) and not balanced:
+                    sorted_arr = example_arrays[current_example].copy()
+                    sorted_arr.sort()
+                    root = animate_balancing(root, sorted_arr)
+                    balanced = True
+                elif next_button.collidepoint(x, y) and not next_disabled:
+                    current_example += 1
+                    array = example_arrays[current_example].copy()
+                    array.sort()
+                    root = build_unbalanced_tree(array)
+                    assign_positions(root, WIDTH // 2, 50, 200)
+                    balanced = False
+
+    pygame.quit()
 
-pygame.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()